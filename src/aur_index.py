@@ -0,0 +1,210 @@
+"""Local AUR metadata index built from the packages-meta-ext-v1.json.gz dump."""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+import urllib.error
+from email.utils import formatdate
+
+from filters import FieldIndex, parse_query
+from trigram import TrigramIndex
+
+
+CACHE_DIR = os.path.expanduser("~/.cache/gnome-aur-manager")
+AUR_META_URL = "https://aur.archlinux.org/packages-meta-ext-v1.json.gz"
+INDEX_FILE = "packages-meta-ext-v1.json.gz"
+
+# Refresh the dump once a day, the AUR regenerates it every few minutes
+INDEX_MAX_AGE = 24 * 60 * 60
+
+
+def record_from_meta(entry):
+    """Convert an AUR metadata entry (dump or RPC format) into a package dict."""
+    return {
+        'name': entry.get('Name', ''),
+        'version': entry.get('Version', ''),
+        'description': entry.get('Description') or '',
+        'repository': 'aur',
+        'package_base': entry.get('PackageBase', ''),
+        'url': entry.get('URL') or '',
+        'votes': entry.get('NumVotes', 0) or 0,
+        'popularity': entry.get('Popularity', 0.0) or 0.0,
+        'maintainer': entry.get('Maintainer'),
+        'out_of_date': entry.get('OutOfDate'),
+        'last_modified': entry.get('LastModified'),
+        'licenses': entry.get('License') or [],
+        'groups': entry.get('Groups') or [],
+        'keywords': entry.get('Keywords') or [],
+        'provides': entry.get('Provides') or [],
+        'depends': entry.get('Depends') or [],
+        'makedepends': entry.get('MakeDepends') or [],
+        'optdepends': entry.get('OptDepends') or [],
+    }
+
+
+class AURIndex:
+    """In-process search over the AUR metadata dump.
+
+    The dump is stored under ~/.cache/gnome-aur-manager and only replaced by
+    an explicit or scheduled refresh(). Searching never touches the network.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, url=AUR_META_URL, max_age=INDEX_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.url = url
+        self.max_age = max_age
+        self.path = os.path.join(cache_dir, INDEX_FILE)
+        self.packages = []
+        self.by_name = {}
+        self.provided_by = {}
+        self._haystacks = []
+        self.fields = FieldIndex()
+        self.fuzzy = TrigramIndex()
+        self._lock = threading.Lock()
+        # Startup, scheduled and manual refreshes may overlap
+        self._refresh_lock = threading.Lock()
+        self.loaded = False
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def age(self):
+        """Seconds since the dump was last refreshed, or None if missing."""
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self):
+        age = self.age()
+        return age is None or age > self.max_age
+
+    def refresh(self, source=None, timeout=60):
+        """Download the dump (or copy a local file) and reload the index.
+
+        source may be a URL or a local path to a packages-meta-ext-v1.json.gz
+        file; it defaults to the official AUR dump URL. Concurrent calls
+        run one after the other, the later one usually gets a 304.
+        """
+        with self._refresh_lock:
+            return self._refresh(source or self.url, timeout)
+
+    def _refresh(self, source, timeout):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Each download gets its own file, a failed one never touches another's
+        fd, tmp_path = tempfile.mkstemp(prefix=INDEX_FILE + ".", suffix=".part", dir=self.cache_dir)
+        os.close(fd)
+
+        try:
+            if os.path.exists(source):
+                shutil.copyfile(source, tmp_path)
+            else:
+                request = urllib.request.Request(source)
+                if self.exists():
+                    # Let the server answer 304 when nothing changed
+                    request.add_header('If-Modified-Since',
+                                       formatdate(os.path.getmtime(self.path), usegmt=True))
+                try:
+                    with urllib.request.urlopen(request, timeout=timeout) as response, \
+                            open(tmp_path, 'wb') as f:
+                        shutil.copyfileobj(response, f)
+                        expected = response.headers.get('Content-Length')
+                        if expected and expected.isdigit() and f.tell() < int(expected):
+                            raise urllib.error.ContentTooShortError(
+                                f"Download ended after {f.tell()} of {expected} bytes", None)
+                except urllib.error.HTTPError as e:
+                    if e.code != 304:
+                        raise
+                    os.utime(self.path)
+                    if not self.loaded:
+                        self.load()
+                    return len(self.packages)
+            os.replace(tmp_path, self.path)
+        finally:
+            # Never leave a truncated download behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return self.load()
+
+    def load(self):
+        """Parse the cached dump into memory. Returns the package count."""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            entries = json.load(f)
+
+        packages = []
+        by_name = {}
+        provided_by = {}
+        haystacks = []
+        for entry in entries:
+            pkg = record_from_meta(entry)
+            packages.append(pkg)
+            by_name[pkg['name']] = pkg
+            for provided in pkg['provides']:
+                # Provides only carry "=version", no other constraints
+                provided_by.setdefault(provided.split('=', 1)[0], []).append(pkg)
+            haystacks.append(f"{pkg['name']}\n{pkg['description']}".lower())
+        fields = FieldIndex()
+        fields.build(packages)
+
+        with self._lock:
+            self.packages = packages
+            self.by_name = by_name
+            self.provided_by = provided_by
+            self._haystacks = haystacks
+            self.fields = fields
+            self.loaded = True
+
+        # Searches can run already, suggestions follow once this is built
+        fuzzy = TrigramIndex()
+        fuzzy.build(packages)
+        self.fuzzy = fuzzy
+        return len(packages)
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def providers(self, name):
+        """Packages that provide name (e.g. foo-git for foo), most voted first."""
+        return sorted(self.provided_by.get(name, ()), key=lambda pkg: pkg['votes'], reverse=True)
+
+    def suggest(self, query, limit=5):
+        """Packages with a name or description similar to a misspelt query."""
+        return [pkg for _similarity, pkg in self.fuzzy.search(query, limit)]
+
+    def search(self, query, limit=None):
+        """Match like yay -Ss: every term must occur in name or description.
+
+        Filters like maintainer:foo or votes:>50 in the query are evaluated
+        on the field indexes first, the text terms only check what is left.
+        """
+        text, filters = parse_query(query)
+        terms = text.lower().split()
+        if not terms and not filters:
+            return []
+
+        with self._lock:
+            packages = self.packages
+            haystacks = self._haystacks
+            fields = self.fields
+
+        if filters:
+            ids = fields.select(filters)
+            if not terms:
+                return [packages[i] for i in ids[:limit]]
+            candidates = ((packages[i], haystacks[i]) for i in ids)
+        else:
+            candidates = zip(packages, haystacks)
+
+        results = []
+        for pkg, haystack in candidates:
+            if all(term in haystack for term in terms):
+                results.append(pkg)
+                if limit and len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,245 @@
+"""Client for the AUR RPC v5 interface (search and info)."""
+import http.client
+import json
+import queue
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from aur_index import record_from_meta
+
+
+AUR_BASE_URL = "https://aur.archlinux.org"
+USER_AGENT = "gnome-aur-manager"
+
+# Keep-alive connections shared by all callers
+RPC_POOL_SIZE = 4
+# Minimum delay between two requests, the AUR limits requests per IP
+RPC_MIN_INTERVAL = 0.2
+RPC_MAX_RETRIES = 4
+RPC_BACKOFF = 0.5
+RPC_TIMEOUT = 10
+# Stay well below the request line limits of aurweb and its proxies
+RPC_MAX_URL_LENGTH = 4000
+
+
+class AURRpcError(Exception):
+    pass
+
+
+class _PendingCall:
+    """A request in flight that identical requests wait on instead of repeating."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class AURClient:
+    def __init__(self, base_url=AUR_BASE_URL, timeout=RPC_TIMEOUT, pool_size=RPC_POOL_SIZE,
+                 min_interval=RPC_MIN_INTERVAL, max_retries=RPC_MAX_RETRIES, backoff=RPC_BACKOFF):
+        parts = urllib.parse.urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_request = 0.0
+
+    def search(self, query, by='name-desc', max_retries=None):
+        """Search AUR packages. Every term of the query must match, like yay -Ss.
+
+        max_retries overrides the client's retry count, e.g. 0 for an
+        interactive search that has a fallback.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        # The RPC only takes one keyword, ask for the most selective one
+        keyword = max(terms, key=len)
+        path = f"/rpc/v5/search/{urllib.parse.quote(keyword, safe='')}?by={by}"
+        packages = [record_from_meta(entry) for entry in self._get(path, max_retries)]
+
+        if len(terms) > 1:
+            packages = [pkg for pkg in packages
+                        if all(term in f"{pkg['name']}\n{pkg['description']}".lower()
+                               for term in terms)]
+        return packages
+
+    def info(self, names):
+        """Fetch full metadata for the given package names."""
+        if not names:
+            return []
+        query = urllib.parse.urlencode([('arg[]', name) for name in names])
+        return [record_from_meta(entry) for entry in self._get(f"/rpc/v5/info?{query}")]
+
+    def info_batch(self, names):
+        """Fetch metadata for many packages, returns a dict keyed by name.
+
+        The names are split into chunks that keep the request URL short
+        enough and the chunks are fetched concurrently over the pool.
+        Packages unknown to the AUR are missing from the result.
+        """
+        names = list(dict.fromkeys(name.split('/')[-1] for name in names))
+        chunks = self._chunk_names(names)
+        if not chunks:
+            return {}
+        if len(chunks) == 1:
+            results = [self.info(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self._idle.maxsize) as executor:
+                results = list(executor.map(self.info, chunks))
+
+        records = {}
+        for chunk_records in results:
+            for record in chunk_records:
+                records[record['name']] = record
+        return records
+
+    def _chunk_names(self, names):
+        base_length = len(self.prefix) + len("/rpc/v5/info?")
+        chunks = []
+        chunk = []
+        length = base_length
+        for name in names:
+            arg_length = len(urllib.parse.urlencode([('arg[]', name)])) + 1
+            if chunk and length + arg_length > RPC_MAX_URL_LENGTH:
+                chunks.append(chunk)
+                chunk = []
+                length = base_length
+            chunk.append(name)
+            length += arg_length
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _get(self, path, max_retries=None):
+        """GET an RPC path, sharing the result with identical requests in flight."""
+        with self._pending_lock:
+            call = self._pending.get(path)
+            owner = call is None
+            if owner:
+                call = _PendingCall()
+                self._pending[path] = call
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._request(path, max_retries)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._pending_lock:
+                del self._pending[path]
+            call.done.set()
+        return call.result
+
+    def _request(self, path, max_retries=None):
+        if max_retries is None:
+            max_retries = self.max_retries
+        delay = self.backoff
+        for attempt in range(max_retries + 1):
+            self._wait_for_rate_limit()
+            try:
+                status, headers, body = self._send(self.prefix + path)
+            except (OSError, http.client.HTTPException) as e:
+                if attempt == max_retries:
+                    raise AURRpcError(f"AUR request failed: {e}") from e
+                time.sleep(delay)
+                delay *= 2
+                continue
+
+            if status == 429 or status >= 500:
+                if attempt == max_retries:
+                    raise AURRpcError(f"AUR returned HTTP {status}")
+                retry_after = headers.get('Retry-After')
+                time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else delay)
+                delay *= 2
+                continue
+            if status != 200:
+                raise AURRpcError(f"AUR returned HTTP {status}")
+
+            try:
+                data = json.loads(body)
+            except ValueError as e:
+                # An HTML error page from a proxy, or a cut off response
+                raise AURRpcError(f"AUR returned invalid JSON: {e}") from e
+            if not isinstance(data, dict):
+                raise AURRpcError("AUR returned an unexpected response")
+            if data.get('type') == 'error':
+                raise AURRpcError(data.get('error', 'Unknown AUR error'))
+            return data.get('results', [])
+
+    def _wait_for_rate_limit(self):
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _send(self, path):
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = self._connect()
+            reused = False
+
+        while True:
+            try:
+                conn.request('GET', path, headers={
+                    'User-Agent': USER_AGENT,
+                    'Accept': 'application/json',
+                    'Connection': 'keep-alive',
+                })
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (ConnectionError, http.client.RemoteDisconnected):
+                conn.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection
+                conn = self._connect()
+                reused = False
+            except Exception:
+                conn.close()
+                raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, response.headers, body
+
+    def _connect(self):
+        if self.scheme == 'http':
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
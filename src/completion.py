@@ -0,0 +1,101 @@
+"""Package name completion over a sorted, compactly stored name array."""
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+
+
+# Repository packages have no popularity, rank them like popular AUR ones
+REPO_WEIGHT = 50.0
+# Prefixes matching more names than this keep their top candidates cached
+CACHE_RANGE = 2000
+CACHE_MAX = 4096
+
+
+class NameCompleter:
+    """Prefix completion for package names.
+
+    All names are kept sorted in one newline-joined string with an offset
+    array instead of a trie or a list of str objects, so a prefix lookup is
+    a bisect over the offsets and the whole AUR takes a few MiB.
+    """
+
+    def __init__(self):
+        self._blob = ""
+        self._offsets = array('I', [0])
+        self._weights = array('f')
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._weights)
+
+    def build(self, *sources):
+        """Build from iterables of package dicts; the first source wins on duplicates."""
+        weights = {}
+        for packages in sources:
+            for pkg in packages:
+                name = pkg['name'].lower()
+                if name in weights:
+                    continue
+                if pkg.get('repository', 'aur') == 'aur':
+                    weights[name] = pkg.get('popularity') or 0.0
+                else:
+                    weights[name] = REPO_WEIGHT
+
+        names = sorted(weights)
+        offsets = array('I', [0])
+        position = 0
+        for name in names:
+            position += len(name) + 1
+            offsets.append(position)
+
+        self._blob = "\n".join(names) + "\n" if names else ""
+        self._offsets = offsets
+        self._weights = array('f', (weights[name] for name in names))
+        self._cache = {}
+
+    def _name(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i + 1] - 1]
+
+    def _range(self, prefix):
+        count = len(self._weights)
+        low = bisect_left(range(count), prefix, key=self._name)
+        # Every name starting with prefix sorts below prefix + U+10FFFF
+        high = bisect_left(range(low, count), prefix + "\U0010ffff", key=self._name) + low
+        return low, high
+
+    def complete(self, prefix, limit=8):
+        """Return up to limit names starting with prefix, most popular first.
+
+        An exact match is always listed first.
+        """
+        prefix = prefix.strip().lower()
+        if not prefix or not self._weights:
+            return []
+
+        cache_key = (prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        low, high = self._range(prefix)
+        best = heapq.nlargest(limit, range(low, high), key=self._weights.__getitem__)
+        names = [self._name(i) for i in best]
+        if low < high and self._name(low) == prefix and prefix not in names:
+            names = [prefix] + names[:limit - 1]
+        elif prefix in names:
+            names.remove(prefix)
+            names.insert(0, prefix)
+
+        if high - low > CACHE_RANGE:
+            if len(self._cache) >= CACHE_MAX:
+                self._cache.clear()
+            self._cache[cache_key] = names
+        return names
+
+    def memory_usage(self):
+        """Bytes used by the name blob, offsets, weights and cache."""
+        return (sys.getsizeof(self._blob) +
+                sys.getsizeof(self._offsets) +
+                sys.getsizeof(self._weights) +
+                sum(sys.getsizeof(names) for names in self._cache.values()))
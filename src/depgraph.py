@@ -0,0 +1,201 @@
+"""Memoized dependency graph for AUR build chains."""
+import re
+import threading
+
+
+# Node kinds, in the order a dependency is looked up
+INSTALLED = 'installed'
+REPO = 'repo'
+AUR = 'aur'
+MISSING = 'missing'
+# Could not be looked up (AUR unreachable, no provides data), not cached
+UNRESOLVED = 'unresolved'
+
+_CONSTRAINT_RE = re.compile(r'[<>=]')
+
+
+def dependency_name(dependency):
+    """Package name of a dependency string like "python>=3.10"."""
+    return _CONSTRAINT_RE.split(dependency, 1)[0].strip()
+
+
+def _provides_map(packages):
+    """Map provided names (e.g. "sh" or "java-runtime") to the providing package."""
+    providers = {}
+    for pkg in packages:
+        for provided in pkg.get('provides') or ():
+            providers.setdefault(dependency_name(provided), pkg)
+    return providers
+
+
+class DependencyNode:
+    def __init__(self, name, kind, package=None, satisfied_by=None):
+        self.name = name
+        self.kind = kind
+        self.package = package
+        # Set when another package provides this name
+        self.satisfied_by = satisfied_by
+        self.depends = []
+        self.makedepends = []
+
+
+class DependencyResolver:
+    """Expands depends/makedepends of AUR packages recursively.
+
+    Installed and repository packages are leaves, pacman takes care of
+    them; only AUR packages are expanded. Unknown names are looked up one
+    level at a time with a single batched AUR query per level, and every
+    node is kept for later queries until the pacman databases change.
+    """
+
+    def __init__(self, local_db, sync_db, aur_lookup, aur_providers=None):
+        """aur_lookup(names) returns {name: package dict} for the names the AUR has.
+
+        aur_providers(names) returns {name: package dict} of an AUR package
+        providing each name, it is asked for the names aur_lookup lacks. It
+        returns None when it cannot tell, those names become UNRESOLVED
+        instead of MISSING, like names of a lookup that failed.
+        """
+        self.local_db = local_db
+        self.sync_db = sync_db
+        self.aur_lookup = aur_lookup
+        self.aur_providers = aur_providers
+        self.lookups = 0
+        self._nodes = {}
+        self._roots = {}
+        self._lock = threading.Lock()
+        # A resolve with UNRESOLVED nodes is not reused
+        self._incomplete = False
+        self._local_packages = None
+        self._sync_packages = None
+        self._local_provides = {}
+        self._sync_provides = {}
+
+    def resolve(self, name):
+        """Return the DependencyNode graph rooted at name."""
+        with self._lock:
+            self._check_databases()
+            if self._incomplete:
+                self._nodes = {}
+                self._roots = {}
+                self._incomplete = False
+            root = self._roots.get(name)
+            if root is None:
+                root = self._roots[name] = self._classify_root(name)
+                if root.kind == AUR and self._classify_local(name) is None:
+                    # Share the node when the package shows up as a dependency
+                    self._nodes.setdefault(name, root)
+            self._expand(root)
+            return root
+
+    def _check_databases(self):
+        # Installed and repository nodes change with pacman -S/-R/-Sy
+        local_packages = self.local_db.packages
+        sync_packages = self.sync_db.packages
+        if local_packages is self._local_packages and sync_packages is self._sync_packages:
+            return
+        self._local_packages = local_packages
+        self._sync_packages = sync_packages
+        self._local_provides = _provides_map(local_packages.values())
+        self._sync_provides = _provides_map(sync_packages)
+        self._nodes = {}
+        self._roots = {}
+
+    def _expand(self, root):
+        """Fill in the dependencies of AUR nodes, one batched lookup per level."""
+        pending = [root]
+        while pending:
+            unknown = set()
+            for node in pending:
+                for dependency in self._dependencies(node):
+                    if dependency not in self._nodes and self._classify_local(dependency) is None:
+                        unknown.add(dependency)
+
+            found = {}
+            providers = {}
+            if unknown:
+                found = self._lookup(self.aur_lookup, unknown)
+                missing = unknown.difference(found or ())
+                if found is not None and missing and self.aur_providers is not None:
+                    # Only names no package is called like, e.g. foo provided by foo-git
+                    providers = self._lookup(self.aur_providers, missing)
+            for dependency in unknown:
+                package = found.get(dependency) if found is not None else None
+                provider = providers.get(dependency) if providers is not None else None
+                if package is not None:
+                    node = DependencyNode(dependency, AUR, package)
+                elif provider is not None:
+                    node = DependencyNode(dependency, AUR, provider, provider['name'])
+                elif found is None or providers is None:
+                    node = DependencyNode(dependency, UNRESOLVED)
+                    self._incomplete = True
+                else:
+                    node = DependencyNode(dependency, MISSING)
+                self._nodes[dependency] = node
+
+            next_pending = []
+            for node in pending:
+                node.depends = [self._node(dep) for dep in self._dependencies(node, 'depends')]
+                node.makedepends = [self._node(dep) for dep in self._dependencies(node, 'makedepends')]
+                for child in node.depends + node.makedepends:
+                    if child.kind == AUR and not child.depends and not child.makedepends \
+                            and self._dependencies(child) and child not in next_pending:
+                        next_pending.append(child)
+            pending = next_pending
+
+    def _lookup(self, lookup, names):
+        """One batched lookup, None if it failed or cannot tell."""
+        self.lookups += 1
+        try:
+            return lookup(sorted(names))
+        except Exception as e:
+            print(f"AUR lookup for {len(names)} dependencies failed: {e}")
+            return None
+
+    def _dependencies(self, node, field=None):
+        if node.kind != AUR or node.package is None:
+            return []
+        fields = (field,) if field else ('depends', 'makedepends')
+        return [dependency_name(dep) for key in fields for dep in node.package.get(key) or ()]
+
+    def _node(self, name):
+        node = self._nodes.get(name)
+        if node is None:
+            node = self._classify_local(name)
+            self._nodes[name] = node
+        return node
+
+    def _classify_root(self, name):
+        """Like a dependency, but an installed AUR package is expanded too."""
+        package = self.sync_db.get(name)
+        if package is not None:
+            return DependencyNode(name, REPO, package)
+        node = self._nodes.get(name)
+        if node is not None and node.kind == AUR:
+            return node
+        found = self._lookup(self.aur_lookup, [name])
+        package = found.get(name) if found is not None else None
+        if package is not None:
+            return DependencyNode(name, AUR, package)
+        node = self._classify_local(name)
+        if node is None and found is None:
+            self._incomplete = True
+            return DependencyNode(name, UNRESOLVED)
+        return node or DependencyNode(name, MISSING)
+
+    def _classify_local(self, name):
+        """Node for an installed or repository package, None if neither."""
+        package = self.local_db.get(name)
+        if package is not None:
+            return DependencyNode(name, INSTALLED, package)
+        provider = self._local_provides.get(name)
+        if provider is not None:
+            return DependencyNode(name, INSTALLED, provider, provider['name'])
+
+        package = self.sync_db.get(name)
+        if package is not None:
+            return DependencyNode(name, REPO, package)
+        provider = self._sync_provides.get(name)
+        if provider is not None:
+            return DependencyNode(name, REPO, provider, provider['name'])
+        return None
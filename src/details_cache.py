@@ -0,0 +1,129 @@
+"""Memory-capped LRU cache for package details, invalidated by pacman database changes."""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from pacman_db import SYNC_DB_DIR
+
+
+DETAILS_CACHE_BYTES = 4 * 1024 * 1024
+# The databases are checked at most this often (seconds)
+DETAILS_CHECK_INTERVAL = 1.0
+
+
+def estimate_size(value):
+    """Rough memory footprint of nested dicts, lists, tuples and strings."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class DetailsCache:
+    """Details keyed by package name.
+
+    Each entry remembers the repository it came from. A changed sync
+    database drops the entries of that repository (and AUR/unknown ones,
+    a repository may now provide them). When local_db (a LocalDatabase)
+    was reloaded with changes, the packages that were installed, removed
+    or upgraded are dropped.
+    """
+
+    def __init__(self, local_db, max_bytes=DETAILS_CACHE_BYTES, sync_dir=SYNC_DB_DIR,
+                 check_interval=DETAILS_CHECK_INTERVAL):
+        self.local_db = local_db
+        self.max_bytes = max_bytes
+        self.sync_dir = sync_dir
+        self.check_interval = check_interval
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._local_packages = local_db.packages
+        self._sync_mtimes = self._read_sync_mtimes()
+
+    def get(self, name):
+        self.check()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            self._entries.move_to_end(name)
+            return entry[0]
+
+    def put(self, name, value, repository=None):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(name)
+            self._entries[name] = (value, repository, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, name=None):
+        """Drop one package, or everything if name is None."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                self._remove(name)
+
+    def check(self, force=False):
+        """Drop entries made stale by changed pacman databases."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+
+            # LocalDatabase replaces its packages dict only when something changed
+            packages = self.local_db.packages
+            if packages is not self._local_packages:
+                versions = {name: record['version'] for name, record in packages.items()}
+                old_versions = {name: record['version'] for name, record in self._local_packages.items()}
+                self._local_packages = packages
+                for name in versions.keys() | old_versions.keys():
+                    if versions.get(name) != old_versions.get(name):
+                        self._remove(name)
+
+            sync_mtimes = self._read_sync_mtimes()
+            if sync_mtimes != self._sync_mtimes:
+                changed = {repository for repository in sync_mtimes.keys() | self._sync_mtimes.keys()
+                           if sync_mtimes.get(repository) != self._sync_mtimes.get(repository)}
+                self._sync_mtimes = sync_mtimes
+                stale = [name for name, (_value, repository, _size) in self._entries.items()
+                         if repository in changed or repository is None or repository == 'aur']
+                for name in stale:
+                    self._remove(name)
+
+    def _remove(self, name):
+        # Called with the lock held
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_sync_mtimes(self):
+        mtimes = {}
+        try:
+            for name in os.listdir(self.sync_dir):
+                if name.endswith('.db'):
+                    mtimes[name[:-len('.db')]] = self._mtime(os.path.join(self.sync_dir, name))
+        except OSError:
+            pass
+        return mtimes
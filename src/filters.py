@@ -0,0 +1,226 @@
+"""Structured search filters like maintainer:foo outofdate:yes votes:>50."""
+import operator
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+
+
+# Field kinds: term fields match a value exactly (case-insensitive), flag
+# fields take yes/no and number fields a comparison or a range
+TERM_FIELDS = {
+    'maintainer': 'maintainer',
+    'license': 'licenses',
+    'group': 'groups',
+    'keyword': 'keywords',
+    'provides': 'provides',
+    'depends': 'depends',
+    'makedepends': 'makedepends',
+}
+FLAG_FIELDS = ('outofdate', 'orphan')
+NUMBER_FIELDS = {
+    'votes': 'votes',
+    'popularity': 'popularity',
+}
+ALIASES = {
+    'orphaned': 'orphan',
+    'out-of-date': 'outofdate',
+    'keywords': 'keyword',
+}
+
+_YES = ('yes', 'true', '1')
+_NO = ('no', 'false', '0')
+_COMPARISON_RE = re.compile(r'(>=|<=|>|<|=)?(-?[0-9.]+)$')
+_RANGE_RE = re.compile(r'(-?[0-9.]+)\.\.(-?[0-9.]+)$')
+# Version constraints of depends/provides entries, e.g. "python>=3.10"
+_CONSTRAINT_RE = re.compile(r'[<>=]')
+_COMPARE = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '=': operator.eq,
+}
+_INVERT = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _field_name(token):
+    field, sep, _value = token.partition(':')
+    field = ALIASES.get(field.lower(), field.lower())
+    if sep and (field in TERM_FIELDS or field in FLAG_FIELDS or field in NUMBER_FIELDS):
+        return field
+    return None
+
+
+def has_filters(query):
+    return any(_field_name(token) for token in query.split())
+
+
+def parse_query(query):
+    """Split a query into free text and a list of (field, op, value) filters.
+
+    Raises FilterError for a known field with an invalid value.
+    """
+    text = []
+    filters = []
+    for token in query.split():
+        field = _field_name(token)
+        if field is None:
+            text.append(token)
+            continue
+
+        value = token.partition(':')[2]
+        if not value:
+            raise FilterError(f"{field}: missing value")
+
+        if field in TERM_FIELDS:
+            if field == 'maintainer' and value.lower() == 'none':
+                filters.append(('orphan', '=', True))
+            else:
+                filters.append((field, '=', _strip_constraint(value.lower())))
+        elif field in FLAG_FIELDS:
+            if value.lower() in _YES:
+                filters.append((field, '=', True))
+            elif value.lower() in _NO:
+                filters.append((field, '=', False))
+            else:
+                raise FilterError(f"{field}: expected yes or no, got {value}")
+        else:
+            filters.append((field,) + _parse_number(field, value))
+    return " ".join(text), filters
+
+
+def _parse_number(field, value):
+    try:
+        match = _RANGE_RE.match(value)
+        if match:
+            return '..', (float(match.group(1)), float(match.group(2)))
+        match = _COMPARISON_RE.match(value)
+        if match:
+            return match.group(1) or '=', float(match.group(2))
+    except ValueError:
+        pass
+    raise FilterError(f"{field}: expected a number like >50, <=10 or 10..100, got {value}")
+
+
+def _strip_constraint(value):
+    return _CONSTRAINT_RE.split(value, 1)[0]
+
+
+class FieldIndex:
+    """Per-field indexes over a package list, addressed by list position.
+
+    Term fields map each lowercase value to the ids using it, flags are
+    byte masks and number fields are kept both by id and value-sorted, so
+    a comparison is a bisect and a slice. select() starts from the most
+    selective filter and checks the others per candidate.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._terms = {}
+        self._flags = {}
+        self._flag_counts = {}
+        self._columns = {}
+        self._sorted = {}
+
+    def build(self, packages):
+        terms = {}
+        for field, key in TERM_FIELDS.items():
+            index = terms[field] = {}
+            for doc_id, pkg in enumerate(packages):
+                values = pkg.get(key)
+                if not values:
+                    continue
+                if isinstance(values, str):
+                    values = (values,)
+                for value in values:
+                    value = _strip_constraint(value.lower())
+                    ids = index.get(value)
+                    if ids is None:
+                        index[value] = array('I', (doc_id,))
+                    elif ids[-1] != doc_id:
+                        ids.append(doc_id)
+
+        flags = {
+            'outofdate': bytearray(1 if pkg.get('out_of_date') else 0 for pkg in packages),
+            'orphan': bytearray(0 if pkg.get('maintainer') else 1 for pkg in packages),
+        }
+        columns = {}
+        sorted_ids = {}
+        for field, key in NUMBER_FIELDS.items():
+            column = array('d', (pkg.get(key) or 0 for pkg in packages))
+            ids = array('I', sorted(range(len(column)), key=column.__getitem__))
+            columns[field] = column
+            sorted_ids[field] = ([column[i] for i in ids], ids)
+
+        self.count = len(packages)
+        self._terms = terms
+        self._flags = flags
+        self._flag_counts = {field: sum(mask) for field, mask in flags.items()}
+        self._columns = columns
+        self._sorted = sorted_ids
+
+    def _ids(self, field, op, value):
+        """All ids matching one filter."""
+        if field in TERM_FIELDS:
+            return self._terms[field].get(value, ())
+        if field in FLAG_FIELDS:
+            mask = self._flags[field]
+            if not value:
+                mask = mask.translate(_INVERT)
+            return list(compress(range(self.count), mask))
+
+        values, ids = self._sorted[field]
+        if op == '..':
+            return ids[bisect_left(values, value[0]):bisect_right(values, value[1])]
+        if op == '>':
+            return ids[bisect_right(values, value):]
+        if op == '>=':
+            return ids[bisect_left(values, value):]
+        if op == '<':
+            return ids[:bisect_left(values, value)]
+        if op == '<=':
+            return ids[:bisect_right(values, value)]
+        return ids[bisect_left(values, value):bisect_right(values, value)]
+
+    def _size(self, field, op, value):
+        """Number of ids matching one filter, without collecting them."""
+        if field in FLAG_FIELDS:
+            flagged = self._flag_counts[field]
+            return flagged if value else self.count - flagged
+        if field in TERM_FIELDS:
+            return len(self._terms[field].get(value, ()))
+        # Slicing an array only copies machine ints
+        return len(self._ids(field, op, value))
+
+    def _predicate(self, field, op, value):
+        if field in TERM_FIELDS:
+            return set(self._terms[field].get(value, ())).__contains__
+        if field in FLAG_FIELDS:
+            mask = self._flags[field]
+            return lambda doc_id: bool(mask[doc_id]) == value
+
+        column = self._columns[field]
+        if op == '..':
+            low, high = value
+            return lambda doc_id: low <= column[doc_id] <= high
+        compare = _COMPARE[op]
+        return lambda doc_id: compare(column[doc_id], value)
+
+    def select(self, filters):
+        """Ids of the packages matching all filters, in no particular order."""
+        if not filters:
+            return list(range(self.count))
+
+        ordered = sorted(filters, key=lambda f: self._size(*f))
+        candidates = self._ids(*ordered[0])
+        for f in ordered[1:]:
+            if not candidates:
+                break
+            candidates = list(filter(self._predicate(*f), candidates))
+        return list(candidates)
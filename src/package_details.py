@@ -0,0 +1,174 @@
+"""Locale-independent package details: parsing yay/pacman -Si and the field layout."""
+import os
+import re
+import time
+
+
+# Rendered fields in display order: (record key, string key, fallback)
+DETAIL_FIELDS = [
+    ('name', 'STRING_DETAIL_NAME', 'Name'),
+    ('version', 'STRING_DETAIL_VERSION', 'Version'),
+    ('description', 'STRING_DETAIL_DESCRIPTION', 'Beschreibung'),
+    ('repository', 'STRING_DETAIL_REPOSITORY', 'Repository'),
+    ('url', 'STRING_DETAIL_URL', 'URL'),
+    ('licenses', 'STRING_DETAIL_LICENSES', 'Lizenzen'),
+    ('groups', 'STRING_DETAIL_GROUPS', 'Gruppen'),
+    ('keywords', 'STRING_DETAIL_KEYWORDS', 'Schlüsselwörter'),
+    ('provides', 'STRING_DETAIL_PROVIDES', 'Stellt bereit'),
+    ('depends', 'STRING_DETAIL_DEPENDS', 'Hängt ab von'),
+    ('makedepends', 'STRING_DETAIL_MAKEDEPENDS', 'Build-Abhängigkeiten'),
+    ('optdepends', 'STRING_DETAIL_OPTDEPENDS', 'Optionale Abhängigkeiten'),
+    ('maintainer', 'STRING_DETAIL_MAINTAINER', 'Betreuer'),
+    ('votes', 'STRING_DETAIL_VOTES', 'Stimmen'),
+    ('popularity', 'STRING_DETAIL_POPULARITY', 'Beliebtheit'),
+    ('last_modified', 'STRING_DETAIL_LAST_MODIFIED', 'Zuletzt geändert'),
+    ('out_of_date', 'STRING_DETAIL_OUT_OF_DATE', 'Veraltet seit'),
+]
+
+# -Si labels under LANG=C -> (record key, kind)
+_SI_FIELDS = {
+    'Repository': ('repository', 'text'),
+    'Name': ('name', 'text'),
+    'Version': ('version', 'text'),
+    'Description': ('description', 'text'),
+    'URL': ('url', 'text'),
+    'Groups': ('groups', 'list'),
+    'Licenses': ('licenses', 'list'),
+    'Keywords': ('keywords', 'list'),
+    'Provides': ('provides', 'list'),
+    'Depends On': ('depends', 'list'),
+    'Make Deps': ('makedepends', 'list'),
+    'Optional Deps': ('optdepends', 'lines'),
+    'Maintainer': ('maintainer', 'text'),
+    'Votes': ('votes', 'int'),
+    'Popularity': ('popularity', 'float'),
+    'Last Modified': ('last_modified', 'date'),
+    'Out-of-date': ('out_of_date', 'date'),
+}
+# Every -Si output has these, translated labels lack at least one of them
+_REQUIRED_KEYS = {'name', 'version', 'description'}
+_LIST_KEYS = ('groups', 'licenses', 'keywords', 'provides', 'depends', 'makedepends', 'optdepends')
+
+_SI_LINE_RE = re.compile(r'([^\s:][^:]*?)\s*: (.*)$')
+_DATE_FORMATS = ('%a %d %b %Y %I:%M:%S %p', '%a %d %b %Y %H:%M:%S', '%a %b %d %H:%M:%S %Y')
+
+
+def c_locale_env(environ):
+    """Copy of environ that makes yay and pacman print untranslated labels and C-locale dates."""
+    # yay picks its translation from LANGUAGE before LC_ALL, gettext
+    # ignores LANGUAGE once the locale is C
+    return dict(environ, LANG='C', LC_ALL='C', LANGUAGE='C')
+
+
+C_LOCALE_ENV = c_locale_env(os.environ)
+
+
+def empty_record():
+    record = {key: None for key, _string_key, _fallback in DETAIL_FIELDS}
+    for key in _LIST_KEYS:
+        record[key] = []
+    return record
+
+
+def parse_si_output(output):
+    """Parse LANG=C yay -Si / pacman -Si output into a details record.
+
+    Only the first package of the output is read. Values of "None" become
+    empty, list fields are lists, votes and popularity numbers and dates
+    Unix timestamps. Raises ValueError for translated output, which would
+    otherwise leave most fields empty.
+    """
+    record = empty_record()
+    seen = set()
+    labels = []
+    current = None
+    for line in output.splitlines():
+        if not line.strip():
+            if seen:
+                # Blank line after the first package
+                break
+            continue
+
+        match = _SI_LINE_RE.match(line)
+        if match is None or line[0].isspace():
+            # Continuation of a multi-line value like Optional Deps
+            if current == 'optdepends' and line.strip() != 'None':
+                record['optdepends'].append(line.strip())
+            continue
+
+        label, value = match.groups()
+        labels.append(label)
+        field = _SI_FIELDS.get(label)
+        if field is None:
+            current = None
+            continue
+        key, kind = field
+        current = key
+        seen.add(key)
+        value = value.strip()
+        if value == 'None' or not value:
+            continue
+
+        if kind == 'list':
+            record[key] = value.split()
+        elif kind == 'lines':
+            # pacman prints one entry per line, yay joins them with two spaces
+            record[key] = re.split(r'\s{2,}', value)
+        elif kind == 'int':
+            record[key] = _to_number(int, value)
+        elif kind == 'float':
+            record[key] = _to_number(float, value)
+        elif kind == 'date':
+            record[key] = parse_date(value)
+        else:
+            record[key] = value
+
+    if labels and not _REQUIRED_KEYS <= seen:
+        raise ValueError(f"-Si output is not in the C locale, labels: {', '.join(labels[:4])}")
+    return record
+
+
+def _to_number(kind, value):
+    try:
+        return kind(value)
+    except ValueError:
+        return None
+
+
+def parse_date(value):
+    """Timestamp of a C-locale date as printed by yay/pacman, None if unknown."""
+    # The time zone abbreviation is not portable to strptime
+    parts = value.split()
+    for candidate in (value, " ".join(parts[:-1])):
+        for date_format in _DATE_FORMATS:
+            try:
+                return int(time.mktime(time.strptime(candidate, date_format)))
+            except (ValueError, OverflowError):
+                pass
+    return None
+
+
+def details_record(package):
+    """Details record from a package dict of the sync databases or the AUR."""
+    record = empty_record()
+    for key in record:
+        value = package.get(key)
+        if value is not None:
+            record[key] = list(value) if key in _LIST_KEYS else value
+    return record
+
+
+def format_value(key, value):
+    """Display text of one field value, empty if there is nothing to show."""
+    if value is None or value == [] or value == '':
+        return ''
+    if key == 'optdepends':
+        return '\n'.join(value)
+    if key in _LIST_KEYS:
+        return '  '.join(value)
+    if key == 'popularity':
+        return f"{value:.2f}"
+    if key in ('last_modified', 'out_of_date'):
+        # Rendered in the user's locale, unlike the parsed source
+        return time.strftime('%x', time.localtime(value))
+    return str(value)
@@ -0,0 +1,263 @@
+"""Readers for the pacman databases under /var/lib/pacman."""
+import json
+import os
+import tarfile
+import threading
+
+from aur_index import CACHE_DIR
+
+
+LOCAL_DB_DIR = "/var/lib/pacman/local"
+SYNC_DB_DIR = "/var/lib/pacman/sync"
+SYNC_CACHE_DIR = os.path.join(CACHE_DIR, "sync")
+
+# desc fields kept in the compact records, everything else is skipped
+_LIST_FIELDS = {
+    'LICENSE': 'licenses',
+    'GROUPS': 'groups',
+    'PROVIDES': 'provides',
+    'DEPENDS': 'depends',
+    'MAKEDEPENDS': 'makedepends',
+    'OPTDEPENDS': 'optdepends',
+}
+_TEXT_FIELDS = {
+    'NAME': 'name',
+    'VERSION': 'version',
+    'DESC': 'description',
+    'URL': 'url',
+    'BASE': 'package_base',
+}
+
+
+def parse_desc(text):
+    """Parse a pacman desc file into a dict of %FIELD% -> list of lines."""
+    fields = {}
+    key = None
+    for line in text.splitlines():
+        if line.startswith('%') and line.endswith('%') and len(line) > 2:
+            key = line[1:-1]
+            fields[key] = []
+        elif line and key is not None:
+            fields[key].append(line)
+        else:
+            key = None
+    return fields
+
+
+def record_from_desc(fields, repository):
+    record = {'repository': repository}
+    for field, key in _TEXT_FIELDS.items():
+        values = fields.get(field)
+        record[key] = values[0] if values else ''
+    for field, key in _LIST_FIELDS.items():
+        record[key] = fields.get(field, [])
+    return record
+
+
+def read_sync_db(path):
+    """Stream a sync .db archive and return compact package records."""
+    repository = os.path.basename(path)[:-len('.db')]
+    records = []
+    # 'r|*' reads the (compressed) tar sequentially without seeking
+    with tarfile.open(path, 'r|*') as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.endswith('/desc'):
+                continue
+            f = archive.extractfile(member)
+            if f is None:
+                continue
+            fields = parse_desc(f.read().decode('utf-8', errors='replace'))
+            records.append(record_from_desc(fields, repository))
+    return records
+
+
+class SyncDatabase:
+    """In-process search over the pacman sync databases.
+
+    Parsed records are cached in memory and on disk, keyed on the mtime of
+    each .db file, so a database is only parsed again after pacman -Sy.
+    """
+
+    def __init__(self, db_dir=SYNC_DB_DIR, cache_dir=SYNC_CACHE_DIR):
+        self.db_dir = db_dir
+        self.cache_dir = cache_dir
+        self.packages = []
+        self.by_name = {}
+        self._haystacks = []
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def mtimes(self):
+        """Current mtimes of all sync databases, keyed by path."""
+        mtimes = {}
+        try:
+            for name in os.listdir(self.db_dir):
+                if name.endswith('.db'):
+                    path = os.path.join(self.db_dir, name)
+                    mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+        return mtimes
+
+    def load(self):
+        """Parse changed databases and rebuild the search arrays.
+
+        Returns True if anything changed since the previous call.
+        """
+        mtimes = self.mtimes()
+        with self._lock:
+            current = {path: mtime for path, (mtime, _records) in self._databases.items()}
+        if mtimes == current:
+            return False
+
+        databases = {}
+        for path, mtime in sorted(mtimes.items()):
+            cached = self._databases.get(path)
+            if cached is not None and cached[0] == mtime:
+                databases[path] = cached
+                continue
+            records = self._read_cached(path, mtime)
+            if records is None:
+                try:
+                    records = read_sync_db(path)
+                except (OSError, tarfile.TarError) as e:
+                    print(f"Error reading sync database {path}: {e}")
+                    continue
+                self._write_cached(path, mtime, records)
+            databases[path] = (mtime, records)
+
+        packages = [pkg for _mtime, records in databases.values() for pkg in records]
+        by_name = {}
+        for pkg in packages:
+            # A name in several repositories resolves to the first one seen
+            by_name.setdefault(pkg['name'], pkg)
+        haystacks = [f"{pkg['name']}\n{pkg['description']}".lower() for pkg in packages]
+
+        with self._lock:
+            self._databases = databases
+            self.packages = packages
+            self.by_name = by_name
+            self._haystacks = haystacks
+        return True
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def search(self, query):
+        """Match like yay -Ss: every term must occur in name or description."""
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        with self._lock:
+            packages = self.packages
+            haystacks = self._haystacks
+        return [pkg for pkg, haystack in zip(packages, haystacks)
+                if all(term in haystack for term in terms)]
+
+    def _cache_path(self, path):
+        return os.path.join(self.cache_dir, os.path.basename(path) + '.json')
+
+    def _read_cached(self, path, mtime):
+        try:
+            with open(self._cache_path(path), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('mtime') == mtime:
+                return data['packages']
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def _write_cached(self, path, mtime, records):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_path = self._cache_path(path)
+            with open(cache_path + '.part', 'w', encoding='utf-8') as f:
+                json.dump({'mtime': mtime, 'packages': records}, f)
+            os.replace(cache_path + '.part', cache_path)
+        except OSError as e:
+            print(f"Error writing sync database cache: {e}")
+
+
+class LocalDatabase:
+    """Installed packages read from the desc files of the local database.
+
+    load() stats every desc file but only parses the new or modified ones,
+    so it is cheap to call again after every pacman transaction. Records
+    of unchanged entries and, if nothing changed, the packages dict itself
+    are kept, callers may compare them by identity.
+    """
+
+    def __init__(self, db_dir=LOCAL_DB_DIR):
+        self.db_dir = db_dir
+        self.packages = {}
+        self.loaded = False
+        # entry directory -> (record, desc mtime)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Sync with the database directory. Returns True if anything changed."""
+        try:
+            names = os.listdir(self.db_dir)
+        except OSError as e:
+            print(f"Error reading local database: {e}")
+            return False
+
+        entries = {}
+        for entry in names:
+            try:
+                mtime = os.stat(os.path.join(self.db_dir, entry, 'desc')).st_mtime_ns
+            except OSError:
+                # ALPM_DB_VERSION, or an entry pacman has not written yet
+                continue
+            known = self._entries.get(entry)
+            if known is not None and known[1] == mtime:
+                entries[entry] = known
+                continue
+            # New, or rewritten in place like pacman -D --asdeps does
+            record = self._read_entry(entry)
+            if record is not None:
+                entries[entry] = (record, mtime)
+
+        with self._lock:
+            changed = (entries.keys() != self._entries.keys() or
+                       any(self._entries[entry] is not known for entry, known in entries.items()))
+            if changed:
+                self._entries = entries
+                self.packages = {record['name']: record for record, _mtime in entries.values()}
+            self.loaded = True
+        return changed
+
+    def _read_entry(self, entry):
+        path = os.path.join(self.db_dir, entry, 'desc')
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                fields = parse_desc(f.read())
+        except OSError:
+            return None
+        if 'NAME' not in fields:
+            return None
+        record = record_from_desc(fields, 'local')
+        # REASON 1 means installed as a dependency, missing means explicitly
+        reason = fields.get('REASON', ['0'])
+        record['reason'] = 'dependency' if reason and reason[0] == '1' else 'explicit'
+        return record
+
+    def is_installed(self, name):
+        return name in self.packages
+
+    def get(self, name):
+        return self.packages.get(name)
+
+    def version(self, name):
+        record = self.packages.get(name)
+        return record['version'] if record else None
+
+    def search(self, query):
+        """Match like pacman -Qs: every term must occur in name or description."""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        return [pkg for pkg in list(self.packages.values())
+                if all(term in f"{pkg['name']}\n{pkg['description']}".lower() for term in terms)]
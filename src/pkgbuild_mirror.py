@@ -0,0 +1,138 @@
+"""Local mirror of AUR package git repositories, for reviewing PKGBUILDs."""
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+
+from aur_index import CACHE_DIR
+
+
+PKGBUILD_DIR = os.path.join(CACHE_DIR, "pkgbuilds")
+AUR_GIT_URL = "https://aur.archlinux.org/{}.git"
+# A package base is fetched again at most this often (seconds)
+FETCH_INTERVAL = 5 * 60
+GIT_TIMEOUT = 60
+
+_XDG_CONFIG_HOME = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser("~/.config")
+_XDG_CACHE_HOME = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache")
+YAY_CONFIG = os.path.join(_XDG_CONFIG_HOME, "yay", "config.json")
+YAY_BUILD_DIR = os.path.join(_XDG_CACHE_HOME, "yay")
+
+# AUR package base names, also keeps them valid in ref names and off git's options
+_PKGBASE_RE = re.compile(r'^[a-z0-9@_+][a-z0-9@._+-]*$')
+
+
+class MirrorError(Exception):
+    pass
+
+
+def yay_build_dir(config_path=YAY_CONFIG):
+    """Directory yay clones AUR packages into, the buildDir of its config or the default."""
+    try:
+        with open(config_path, encoding='utf-8') as f:
+            build_dir = json.load(f).get('buildDir')
+    except (OSError, ValueError, AttributeError):
+        build_dir = None
+    return os.path.expanduser(build_dir) if build_dir else YAY_BUILD_DIR
+
+
+class PKGBUILDMirror:
+    """All mirrored package bases share one shallow bare repository.
+
+    Every package base is fetched with depth 1 into refs/aur/<pkgbase>, so
+    the objects of common files are stored once and a fetch only transfers
+    what changed. After an install the revision yay built is pinned as
+    refs/installed/<pkgbase>, the base for the diff shown before the next
+    update.
+    """
+
+    def __init__(self, cache_dir=PKGBUILD_DIR, remote_url=AUR_GIT_URL, fetch_interval=FETCH_INTERVAL,
+                 build_dir=None):
+        """remote_url is formatted with the package base, build_dir defaults to yay's."""
+        self.repo_dir = os.path.join(cache_dir, "aur.git")
+        self.remote_url = remote_url
+        self.fetch_interval = fetch_interval
+        self.build_dir = build_dir or yay_build_dir()
+        self._fetched_at = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, pkgbase, force=False):
+        """Update refs/aur/<pkgbase> from the AUR and return its commit."""
+        self._check_name(pkgbase)
+        with self._lock:
+            self._ensure_repo()
+            fetched_at = self._fetched_at.get(pkgbase)
+            if not force and fetched_at is not None and time.monotonic() - fetched_at < self.fetch_interval:
+                return self._resolve(f"refs/aur/{pkgbase}")
+            self._git('fetch', '--quiet', '--depth=1', '--no-tags',
+                      self.remote_url.format(pkgbase), f"+HEAD:refs/aur/{pkgbase}")
+            self._fetched_at[pkgbase] = time.monotonic()
+            return self._resolve(f"refs/aur/{pkgbase}")
+
+    def pkgbuild(self, pkgbase):
+        """PKGBUILD of the fetched revision."""
+        self._check_name(pkgbase)
+        return self._git('show', f"refs/aur/{pkgbase}:PKGBUILD")
+
+    def installed_revision(self, pkgbase):
+        self._check_name(pkgbase)
+        if not os.path.isdir(self.repo_dir):
+            return None
+        return self._resolve(f"refs/installed/{pkgbase}")
+
+    def diff_installed(self, pkgbase):
+        """Diff of the installed revision against the fetched one, None if no install was recorded."""
+        if self.installed_revision(pkgbase) is None:
+            return None
+        return self._git('diff', '--no-color', f"refs/installed/{pkgbase}", f"refs/aur/{pkgbase}", '--')
+
+    def mark_installed(self, pkgbase):
+        """Pin the revision checked out in yay's clone of pkgbase as the installed one.
+
+        The AUR may have moved on while yay was building, so the revision
+        is taken from the clone yay built from, not fetched again.
+        """
+        self._check_name(pkgbase)
+        clone_dir = os.path.join(self.build_dir, pkgbase)
+        if not os.path.isdir(clone_dir):
+            raise MirrorError(f"No build directory for {pkgbase} in {self.build_dir}")
+        with self._lock:
+            self._ensure_repo()
+            self._git('fetch', '--quiet', '--depth=1', '--no-tags',
+                      clone_dir, f"+HEAD:refs/installed/{pkgbase}")
+            return self._resolve(f"refs/installed/{pkgbase}")
+
+    def _ensure_repo(self):
+        # Called with the lock held
+        if os.path.isdir(self.repo_dir):
+            return
+        os.makedirs(os.path.dirname(self.repo_dir), exist_ok=True)
+        self._git('init', '--quiet', '--bare', self.repo_dir, git_dir=False)
+
+    def _resolve(self, ref):
+        try:
+            return self._git('rev-parse', '--verify', '--quiet', f"{ref}^{{commit}}").strip() or None
+        except MirrorError:
+            return None
+
+    def _git(self, *args, git_dir=True):
+        command = ['git']
+        if git_dir:
+            command += ['--git-dir', self.repo_dir]
+        command += args
+        env = dict(os.environ, GIT_TERMINAL_PROMPT='0', LC_ALL='C')
+        try:
+            result = subprocess.run(command, capture_output=True, text=True,
+                                    timeout=GIT_TIMEOUT, env=env)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise MirrorError(str(e)) from e
+        if result.returncode != 0:
+            raise MirrorError(result.stderr.strip() or f"git {args[0]} failed")
+        return result.stdout
+
+    @staticmethod
+    def _check_name(pkgbase):
+        if not _PKGBASE_RE.match(pkgbase or ''):
+            raise MirrorError(f"Invalid package base: {pkgbase!r}")
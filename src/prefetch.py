@@ -0,0 +1,122 @@
+"""Background prefetching of package details on a bounded worker pool."""
+import itertools
+import threading
+from queue import PriorityQueue
+
+
+# Lower values are fetched first
+PRIORITY_SELECTED = 0
+PRIORITY_NEIGHBOR = 1
+PRIORITY_VISIBLE = 2
+
+PREFETCH_WORKERS = 3
+
+
+class _Pending:
+    def __init__(self, priority):
+        self.priority = priority
+        self.callbacks = []
+
+
+class Prefetcher:
+    """Runs load(key) for queued keys, most urgent first.
+
+    prefetch() queues keys without waiting; request() moves a key to the
+    front of the queue (or joins a fetch already running) and is called
+    back with the result.
+    Queued entries are never duplicated, raising a key's priority just adds
+    a second queue entry and the stale one is skipped.
+
+    load() is expected to store its result in cache, keys found there are
+    neither prefetched nor queued again.
+    """
+
+    def __init__(self, load, cache, workers=PREFETCH_WORKERS):
+        self._load = load
+        self._cache = cache
+        self._workers = workers
+        self._queue = PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._running = {}
+        self._threads = []
+
+    def prefetch(self, keys, priority=PRIORITY_VISIBLE):
+        keys = [key for key in keys if self._cache.get(key) is None]
+        with self._lock:
+            for key in keys:
+                self._schedule(key, priority)
+            self._start_workers()
+
+    def request(self, key, callback):
+        """Fetch key ahead of everything queued and call callback(value, error).
+
+        The callback runs right away for a cached key, otherwise on a
+        worker thread.
+        """
+        value = self._cache.get(key)
+        if value is not None:
+            callback(value, None)
+            return
+        with self._lock:
+            pending = self._schedule(key, PRIORITY_SELECTED)
+            pending.callbacks.append(callback)
+            self._start_workers()
+
+    def cancel_pending(self):
+        """Drop queued prefetches, e.g. for the results of an old search.
+
+        Requested keys and fetches already running are kept.
+        """
+        with self._lock:
+            for key, pending in list(self._pending.items()):
+                if pending.priority != PRIORITY_SELECTED:
+                    del self._pending[key]
+
+    def _schedule(self, key, priority):
+        # Called with the lock held
+        running = self._running.get(key)
+        if running is not None:
+            return running
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending(priority)
+        elif priority < pending.priority:
+            pending.priority = priority
+        else:
+            return pending
+        self._queue.put((priority, next(self._counter), key))
+        return pending
+
+    def _start_workers(self):
+        # Called with the lock held
+        while len(self._threads) < self._workers:
+            thread = threading.Thread(target=self._work, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self):
+        while True:
+            priority, _seq, key = self._queue.get()
+            with self._lock:
+                pending = self._pending.get(key)
+                # Cancelled, or a stale entry of a key that was moved up
+                if pending is None or pending.priority != priority:
+                    continue
+                del self._pending[key]
+                self._running[key] = pending
+
+            value = None
+            error = None
+            try:
+                value = self._load(key)
+            except Exception as e:
+                error = e
+
+            with self._lock:
+                del self._running[key]
+                callbacks = pending.callbacks
+            for callback in callbacks:
+                callback(value, error)
@@ -0,0 +1,119 @@
+"""Relevance ranking for search results (BM25 over name and description)."""
+import heapq
+import math
+import re
+from functools import lru_cache
+
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Bonuses on top of the BM25 score so that obvious hits stay on top
+EXACT_NAME_BONUS = 100.0
+NAME_PREFIX_BONUS = 10.0
+# Popularity and votes are log-scaled so they only break near-ties
+POPULARITY_WEIGHT = 0.5
+VOTES_WEIGHT = 0.2
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Normalized (name, description) keys are shared by all rankings, the
+# whole AUR fits and the least recently ranked packages go first
+KEY_CACHE_SIZE = 200000
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _normalize(text):
+    """Return (' token token ...', token count) for fast prefix counting.
+
+    Counting ' term' in the joined string counts the tokens starting with
+    term, prefix matches count because the query is often still being typed.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    return ' ' + ' '.join(tokens), len(tokens)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _package_key(name, description):
+    name_lower = name.lower()
+    return (name_lower,) + _normalize(name_lower) + _normalize(description)
+
+
+def score_packages(packages, query, boost_popularity=True):
+    """Return (score, package) pairs for the packages.
+
+    Names and descriptions are normalized once per package, idf is taken
+    over the given result set.
+    """
+    query_lower = query.lower().strip()
+    terms = tokenize(query_lower)
+    if not packages:
+        return []
+
+    docs = []
+    total_name = 0
+    total_desc = 0
+    for pkg in packages:
+        key = _package_key(pkg['name'], pkg.get('description') or '')
+        total_name += key[2]
+        total_desc += key[4]
+        docs.append((pkg,) + key)
+
+    count = len(docs)
+    avg_name = total_name / count or 1.0
+    avg_desc = total_desc / count or 1.0
+
+    # Document frequency per query term, over both fields
+    needles = [' ' + term for term in dict.fromkeys(terms)]
+    idf = []
+    for needle in needles:
+        df = sum(1 for doc in docs if needle in doc[2] or needle in doc[4])
+        idf.append(math.log((count - df + 0.5) / (df + 0.5) + 1.0))
+    weighted = list(zip(needles, idf))
+
+    name_factor = B / avg_name
+    desc_factor = B / avg_desc
+    scored = []
+    for pkg, name_lower, name_text, name_len, desc_text, desc_len in docs:
+        name_weight = NAME_WEIGHT / (1.0 - B + name_factor * name_len)
+        desc_weight = DESCRIPTION_WEIGHT / (1.0 - B + desc_factor * desc_len)
+
+        score = 0.0
+        for needle, term_idf in weighted:
+            tf = (name_weight * name_text.count(needle) +
+                  desc_weight * desc_text.count(needle))
+            if tf:
+                score += term_idf * tf * (K1 + 1) / (tf + K1)
+
+        if name_lower == query_lower:
+            score += EXACT_NAME_BONUS
+        elif query_lower and name_lower.startswith(query_lower):
+            score += NAME_PREFIX_BONUS
+
+        if boost_popularity:
+            score += POPULARITY_WEIGHT * math.log1p(pkg.get('popularity') or 0.0)
+            score += VOTES_WEIGHT * math.log1p(pkg.get('votes') or 0)
+
+        scored.append((score, pkg))
+    return scored
+
+
+def rank_packages(packages, query, limit=None, boost_popularity=True):
+    """Return the packages ordered by relevance, only the best limit if given."""
+    scored = score_packages(packages, query, boost_popularity)
+
+    def key(item):
+        # Equal scores are ordered by name
+        return (-item[0], item[1]['name'])
+
+    if limit is not None and limit < len(scored):
+        best = heapq.nsmallest(limit, scored, key=key)
+    else:
+        best = sorted(scored, key=key)
+    return [pkg for _score, pkg in best]
@@ -0,0 +1,129 @@
+"""Reverse dependencies of installed packages, for previewing a removal."""
+import threading
+
+from depgraph import dependency_name
+
+
+def _optdepend_name(optdepend):
+    """Package name of an optdepends line like "python-pillow: image support"."""
+    return dependency_name(optdepend.split(':', 1)[0])
+
+
+def _satisfies(record):
+    return [record['name']] + [dependency_name(provided) for provided in record.get('provides') or ()]
+
+
+class ReverseDependencyIndex:
+    """Which installed packages need a name, kept in sync with a LocalDatabase.
+
+    The index follows local_db.packages lazily: LocalDatabase keeps the
+    record of an unchanged entry across loads, so only records that were
+    added, removed or replaced are indexed again.
+    """
+
+    def __init__(self, local_db):
+        self.local_db = local_db
+        self._packages = None
+        self._records = {}
+        # name -> installed packages satisfying it (by name or provides)
+        self._providers = {}
+        # name -> installed packages listing it in depends / optdepends
+        self._required_by = {}
+        self._optional_for = {}
+        self._lock = threading.Lock()
+
+    def update(self):
+        packages = self.local_db.packages
+        if packages is self._packages:
+            return
+        for name, record in list(self._records.items()):
+            if packages.get(name) is not record:
+                self._remove(record)
+        for name, record in packages.items():
+            if self._records.get(name) is not record:
+                self._add(record)
+        self._packages = packages
+
+    def removal_impact(self, targets):
+        """Preview of removing targets the way yay -Rns does.
+
+        Returns (removed, broken, optional): the dependencies removed along
+        with the targets because nothing else needs them, a dict of the
+        packages left with unsatisfied dependencies -> those dependencies,
+        and a dict of the packages losing optional dependencies.
+        """
+        with self._lock:
+            self.update()
+            removal = {name for name in targets if name in self._records}
+            self._add_orphans(removal)
+
+            broken = {}
+            optional = {}
+            for name in removal:
+                for provided in _satisfies(self._records[name]):
+                    if self._providers.get(provided, set()) - removal:
+                        continue
+                    for requirer in self._required_by.get(provided, ()):
+                        if requirer not in removal:
+                            broken.setdefault(requirer, set()).add(provided)
+                    for requirer in self._optional_for.get(provided, ()):
+                        if requirer not in removal:
+                            optional.setdefault(requirer, set()).add(provided)
+
+            removed = sorted(removal - set(targets))
+            return (removed,
+                    {name: sorted(needs) for name, needs in broken.items()},
+                    {name: sorted(needs) for name, needs in optional.items()})
+
+    def _add_orphans(self, removal):
+        # -s: dependencies installed as such and not needed outside the removal
+        pending = list(removal)
+        while pending:
+            record = self._records[pending.pop()]
+            for dependency in record.get('depends') or ():
+                # Like pacman, only the first satisfier in name order counts
+                providers = self._providers.get(dependency_name(dependency))
+                if not providers:
+                    continue
+                provider = min(providers)
+                if provider in removal or self._records[provider].get('reason') != 'dependency':
+                    continue
+                if self._needed_outside(provider, removal):
+                    continue
+                removal.add(provider)
+                pending.append(provider)
+
+    def _needed_outside(self, name, removal):
+        for provided in _satisfies(self._records[name]):
+            for requirer in self._required_by.get(provided, ()):
+                if requirer not in removal:
+                    return True
+        return False
+
+    def _add(self, record):
+        name = record['name']
+        self._records[name] = record
+        for provided in _satisfies(record):
+            self._providers.setdefault(provided, set()).add(name)
+        for dependency in record.get('depends') or ():
+            self._required_by.setdefault(dependency_name(dependency), set()).add(name)
+        for optdepend in record.get('optdepends') or ():
+            self._optional_for.setdefault(_optdepend_name(optdepend), set()).add(name)
+
+    def _remove(self, record):
+        name = record['name']
+        del self._records[name]
+        for provided in _satisfies(record):
+            self._discard(self._providers, provided, name)
+        for dependency in record.get('depends') or ():
+            self._discard(self._required_by, dependency_name(dependency), name)
+        for optdepend in record.get('optdepends') or ():
+            self._discard(self._optional_for, _optdepend_name(optdepend), name)
+
+    @staticmethod
+    def _discard(index, key, name):
+        names = index.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del index[key]
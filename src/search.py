@@ -0,0 +1,133 @@
+"""Query matching and multi-source search shared by the backends and the window."""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from filters import has_filters
+
+
+def query_terms(query):
+    return query.lower().split()
+
+
+def package_matches(pkg, terms):
+    """True if every term occurs in the name or description, like yay -Ss."""
+    haystack = f"{pkg['name']}\n{pkg['description']}".lower()
+    return all(term in haystack for term in terms)
+
+
+def is_refinement(old_query, new_query):
+    """True if every result of new_query is necessarily a result of old_query.
+
+    That holds when each old term is contained in some new term, e.g.
+    "python" -> "python-req" or "python" -> "python requests".
+    """
+    old_terms = query_terms(old_query)
+    new_terms = query_terms(new_query)
+    return bool(old_terms) and all(any(old in new for new in new_terms) for old in old_terms)
+
+
+class ResultNarrower:
+    """Remembers the last complete result set and filters it for refined queries."""
+
+    def __init__(self):
+        self._last = None
+
+    def remember(self, query, packages):
+        """Store a complete (untruncated) result set returned by a backend."""
+        self._last = (query, packages)
+
+    def forget(self):
+        self._last = None
+
+    def narrow(self, query):
+        """Return the results for query from memory, or None if a backend is needed."""
+        last = self._last
+        if last is None or has_filters(query):
+            return None
+
+        old_query, packages = last
+        if not is_refinement(old_query, query):
+            return None
+
+        terms = query_terms(query)
+        return [pkg for pkg in packages if package_matches(pkg, terms)]
+
+
+class SearchSource:
+    """A named search backend; lower rank wins when sources return the same name.
+
+    An annotating source (installed packages) never replaces records of
+    other sources, it only adds packages nobody else knows. Whether a
+    package is installed is not recorded, results are cached and that
+    changes with every install.
+    """
+
+    def __init__(self, name, search, rank=0, annotates=False):
+        self.name = name
+        self.search = search
+        self.rank = rank
+        self.annotates = annotates
+
+
+def _timed_search(source, query):
+    start = time.monotonic()
+    packages = source.search(query)
+    return packages, time.monotonic() - start
+
+
+def search_sources(query, sources, on_update=None, is_cancelled=None):
+    """Query all sources at once and merge their results as they finish.
+
+    on_update(packages, latencies) is called with the merged, deduplicated
+    packages each time a source finishes, so a slow source never holds
+    back the fast ones. latencies maps source names to seconds (None for
+    a failed source). Returns (packages, latencies, complete), or None if
+    is_cancelled() turned true; complete is False if a source failed.
+    """
+    merged = {}
+    ranks = {}
+    local = {}
+    latencies = {}
+    complete = True
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(sources)))
+    futures = {executor.submit(_timed_search, source, query): source for source in sources}
+    try:
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                packages, latency = future.result()
+            except Exception as e:
+                print(f"Search source {source.name} failed: {e}")
+                latencies[source.name] = None
+                complete = False
+                continue
+
+            latencies[source.name] = latency
+            if packages is None:
+                # The source gave up because the search was superseded
+                complete = False
+                continue
+
+            for pkg in packages:
+                name = pkg['name']
+                if source.annotates:
+                    local[name] = pkg
+                elif name not in merged or source.rank < ranks[name]:
+                    merged[name] = pkg
+                    ranks[name] = source.rank
+
+            if is_cancelled is not None and is_cancelled():
+                return None
+            if on_update is not None:
+                on_update(_combine(merged, local), dict(latencies))
+    finally:
+        executor.shutdown(wait=False)
+
+    return _combine(merged, local), latencies, complete
+
+
+def _combine(merged, local):
+    packages = list(merged.values())
+    packages.extend(pkg for name, pkg in local.items() if name not in merged)
+    return packages
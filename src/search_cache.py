@@ -0,0 +1,159 @@
+"""Two-tier (memory LRU + disk) cache for search results.
+
+Only called from search threads, get() may read from disk.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from aur_index import CACHE_DIR
+
+
+SEARCH_CACHE_DIR = os.path.join(CACHE_DIR, "search")
+
+# Results younger than the TTL are served without asking the backend,
+# older ones are still shown instantly but revalidated in the background
+SEARCH_CACHE_TTL = 15 * 60
+SEARCH_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+SEARCH_CACHE_MEMORY_ENTRIES = 64
+SEARCH_CACHE_DISK_BYTES = 32 * 1024 * 1024
+# Larger results stay in memory only, writing them costs more than asking again
+SEARCH_CACHE_DISK_MAX_PACKAGES = 2000
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    def __init__(self, cache_dir=SEARCH_CACHE_DIR, ttl=SEARCH_CACHE_TTL,
+                 max_age=SEARCH_CACHE_MAX_AGE, max_entries=SEARCH_CACHE_MEMORY_ENTRIES,
+                 max_disk_bytes=SEARCH_CACHE_DISK_BYTES, max_disk_packages=SEARCH_CACHE_DISK_MAX_PACKAGES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.max_disk_packages = max_disk_packages
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, query):
+        """Return (packages, fresh) for a cached query, or None on a miss."""
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is None:
+                return None
+            self._remember(key, entry)
+
+        stored_at, packages = entry
+        age = time.time() - stored_at
+        if age > self.max_age:
+            self.invalidate(query)
+            return None
+        return packages, age < self.ttl
+
+    def put(self, query, packages, persist=True):
+        """Remember packages for query, on disk too if persist and the result is small enough.
+
+        Results that local sources answer in milliseconds are not worth a
+        disk write, pass persist=False for them.
+        """
+        key = normalize_query(query)
+        if not key:
+            return
+        entry = (time.time(), packages)
+        self._remember(key, entry)
+        if not persist or len(packages) > self.max_disk_packages:
+            return
+        try:
+            self._write_disk(key, entry)
+        except OSError as e:
+            print(f"Error writing search cache: {e}")
+
+    def invalidate(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.unlink(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('query') != key:
+                return None
+            return data['time'], data['packages']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stored_at, packages = entry
+        path = self._path(key)
+        tmp_path = path + ".part"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'query': key, 'time': stored_at, 'packages': packages}, f)
+        os.replace(tmp_path, path)
+        self._enforce_disk_cap()
+
+    def _enforce_disk_cap(self):
+        """Drop the least recently written files until the cap is met."""
+        files = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        files.sort()
+        for _mtime, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
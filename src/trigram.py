@@ -0,0 +1,160 @@
+"""Trigram index for fuzzy, typo-tolerant package lookups."""
+import heapq
+import re
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+
+# Description words found by a fuzzy word match rank below name matches
+DESCRIPTION_WEIGHT = 0.8
+MIN_SIMILARITY = 0.3
+MIN_WORD_SIMILARITY = 0.5
+# Words shorter than this are not worth correcting
+MIN_WORD_LENGTH = 4
+# Description words used by more packages than this are too generic to suggest
+MAX_WORD_DOCS = 2000
+# Postings longer than this (or 5% of all entries) only count when the
+# query has fewer than MIN_CANDIDATE_GRAMS rarer trigrams
+MAX_POSTING = 2000
+MIN_CANDIDATE_GRAMS = 3
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def trigrams(text):
+    """Return the set of trigrams of text, padded so that edges count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _top_similar(postings, sizes, texts, query_grams, limit, min_similarity):
+    """Rank ids in postings by Jaccard similarity with query_grams.
+
+    Candidates are collected from the rarest trigrams first, trigrams that
+    are too common to narrow anything down are skipped once enough grams
+    were used. The best candidates are then verified against their text.
+    """
+    grams = sorted((gram for gram in query_grams if gram in postings),
+                   key=lambda gram: len(postings[gram]))
+    if not grams:
+        return []
+
+    common = max(MAX_POSTING, len(sizes) // 20)
+    counts = Counter()
+    for used, gram in enumerate(grams):
+        posting = postings[gram]
+        if used >= MIN_CANDIDATE_GRAMS and len(posting) > common:
+            break
+        counts.update(posting)
+
+    query_size = len(query_grams)
+    results = []
+    for item_id, _partial in heapq.nlargest(limit * 8, counts.items(), key=itemgetter(1)):
+        padded = f"  {texts[item_id]} "
+        shared = sum(1 for gram in query_grams if gram in padded)
+        similarity = shared / (query_size + sizes[item_id] - shared)
+        if similarity >= min_similarity:
+            results.append((similarity, item_id))
+    results.sort(reverse=True)
+    return results[:limit]
+
+
+class TrigramIndex:
+    """Trigrams of package names plus a vocabulary of description words.
+
+    Names are indexed per package. Description words are indexed once per
+    distinct word, a misspelt query word is matched against that vocabulary
+    and leads to the packages using the corrected word.
+    """
+
+    def __init__(self):
+        self.packages = []
+        self._names = []
+        self._name_postings = {}
+        self._name_sizes = array('H')
+        self._words = []
+        self._word_ids = {}
+        self._word_postings = {}
+        self._word_sizes = array('H')
+        self._word_docs = []
+
+    def build(self, packages):
+        names = []
+        name_postings = {}
+        name_sizes = array('H')
+        words = []
+        word_ids = {}
+        word_docs = []
+
+        for doc_id, pkg in enumerate(packages):
+            name = pkg['name'].lower()
+            names.append(name)
+            grams = trigrams(name)
+            name_sizes.append(min(len(grams), 0xffff))
+            for gram in grams:
+                posting = name_postings.get(gram)
+                if posting is None:
+                    posting = name_postings[gram] = array('I')
+                posting.append(doc_id)
+
+            for word in set(_WORD_RE.findall(pkg['description'].lower())):
+                if len(word) < MIN_WORD_LENGTH:
+                    continue
+                word_id = word_ids.get(word)
+                if word_id is None:
+                    word_id = word_ids[word] = len(words)
+                    words.append(word)
+                    word_docs.append(array('I'))
+                word_docs[word_id].append(doc_id)
+
+        word_postings = {}
+        word_sizes = array('H')
+        for word_id, word in enumerate(words):
+            grams = trigrams(word)
+            word_sizes.append(len(grams))
+            for gram in grams:
+                posting = word_postings.get(gram)
+                if posting is None:
+                    posting = word_postings[gram] = array('I')
+                posting.append(word_id)
+
+        self.packages = packages
+        self._names = names
+        self._name_postings = name_postings
+        self._name_sizes = name_sizes
+        self._words = words
+        self._word_ids = word_ids
+        self._word_postings = word_postings
+        self._word_sizes = word_sizes
+        self._word_docs = word_docs
+
+    def search(self, query, limit=10, min_similarity=MIN_SIMILARITY):
+        """Return up to limit (similarity, package) pairs, best first."""
+        query = " ".join(query.lower().split())
+        if len(query) < MIN_WORD_LENGTH or not self.packages:
+            return []
+
+        scores = {}
+        for similarity, doc_id in _top_similar(self._name_postings, self._name_sizes, self._names,
+                                               trigrams(query), limit, min_similarity):
+            scores[doc_id] = similarity
+
+        for word in _WORD_RE.findall(query):
+            # Known words are already found by the substring search
+            if len(word) < MIN_WORD_LENGTH or word in self._word_ids:
+                continue
+            for similarity, word_id in _top_similar(self._word_postings, self._word_sizes, self._words,
+                                                    trigrams(word), 3, MIN_WORD_SIMILARITY):
+                docs = self._word_docs[word_id]
+                if len(docs) > MAX_WORD_DOCS:
+                    continue
+                score = similarity * DESCRIPTION_WEIGHT
+                for doc_id in docs:
+                    if score > scores.get(doc_id, 0.0):
+                        scores[doc_id] = score
+
+        packages = self.packages
+        best = heapq.nlargest(limit, scores.items(),
+                              key=lambda item: (item[1], packages[item[0]].get('popularity') or 0.0))
+        return [(score, self.packages[doc_id]) for doc_id, score in best]
@@ -1,21 +1,58 @@
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib, Gio
+from gi.repository import Gtk, Adw, GLib, Gio, GObject, Gdk
 import subprocess
 import threading
 import webbrowser
 import os
 import json
-import time
+import shutil
+import select
+import tempfile
 import locale
+from collections import OrderedDict
 from pathlib import Path
 
+from aur_index import AURIndex
+from aur_rpc import AURClient, AURRpcError
+from completion import NameCompleter
+from depgraph import AUR, INSTALLED, MISSING, REPO, UNRESOLVED, DependencyResolver
+from details_cache import DetailsCache
+from filters import FilterError, has_filters, parse_query
+from package_details import C_LOCALE_ENV, DETAIL_FIELDS, details_record, format_value, parse_si_output
+from pacman_db import LOCAL_DB_DIR, LocalDatabase, SyncDatabase
+from pkgbuild_mirror import PKGBUILDMirror
+from prefetch import Prefetcher, PRIORITY_NEIGHBOR, PRIORITY_VISIBLE
+from ranking import rank_packages
+from revdeps import ReverseDependencyIndex
+from search import ResultNarrower, SearchSource, search_sources
+from search_cache import SearchCache
+from yay_parser import iter_yay_packages
+
 
 # Global variables
 STRINGS = {}
 CURRENT_LANGUAGE = None
 
+# Delay between the last keystroke and the search-as-you-type query
+SEARCH_DEBOUNCE_MS = 300
+
+SEARCH_TIMEOUT = 10
+
+# Wait for pacman to finish writing before reloading the installed packages
+LOCAL_DB_RELOAD_MS = 500
+
+# A terminal script that has not started after this long never will (seconds)
+TERMINAL_START_TIMEOUT = 30
+# Reported like a hangup when the script went away without writing its status
+TERMINAL_LOST_STATUS = 129
+
+# Details of this many top results are prefetched after every search
+PREFETCH_TOP = 10
+# AUR records fetched in one batch for queued prefetches, oldest dropped first
+PREFETCH_RECORDS_MAX = 256
+
 
 def load_translations(language=None):
     """Load translations from language-specific .t                    'yay -Sc; echo ""; echo -e "\\033[32m━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\\033[0m"; echo -e "\\033[32mCache geleert - Du kannst das Terminal jetzt schließen!\\033[0m"; echo -e"\\033[32m━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\\033[0m"; echo ""'xt files."""
@@ -98,6 +135,27 @@ def _(key, **kwargs):
     return text
 
 
+def read_script_value(path):
+    """Number (exit status or pid) written by a terminal wrapper script, None if not there yet"""
+    try:
+        with open(path, 'r') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def wait_for_exit(pid):
+    """Block until the process pid exits, it does not have to be our child"""
+    try:
+        pidfd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return
+    try:
+        select.select([pidfd], [], [])
+    finally:
+        os.close(pidfd)
+
+
 def get_terminal_notification(success=True, operation='install'):
     """Generate terminal notification box with translated messages."""
     # Get current language
@@ -174,6 +232,15 @@ echo ""
 '''
 
 
+class PackageObject(GObject.Object):
+    """List model item wrapping a package dict"""
+    __gtype_name__ = 'AURManagerPackageObject'
+
+    def __init__(self, pkg):
+        super().__init__()
+        self.pkg = pkg
+
+
 class DisclaimerDialog(Gtk.Dialog):
     def __init__(self, parent, accent_hex):
         super().__init__(transient_for=parent, modal=True)
@@ -361,6 +428,239 @@ class DisclaimerDialog(Gtk.Dialog):
         return True
 
 
+class DependencyNodeObject(GObject.Object):
+    """Tree model item wrapping a DependencyNode"""
+    __gtype_name__ = 'AURManagerDependencyNodeObject'
+
+    def __init__(self, node, build_only=False, ancestors=()):
+        super().__init__()
+        self.node = node
+        self.build_only = build_only
+        self.ancestors = ancestors
+
+    def children(self):
+        # A package already on the path to the root would repeat forever
+        if self.node.name in self.ancestors:
+            return []
+        ancestors = self.ancestors + (self.node.name,)
+        children = [DependencyNodeObject(child, False, ancestors) for child in self.node.depends]
+        children += [DependencyNodeObject(child, True, ancestors) for child in self.node.makedepends]
+        return children
+
+
+class DependencyTreeDialog(Gtk.Dialog):
+    """Dependency tree of a package, AUR packages are expanded recursively"""
+
+    KIND_LABELS = {
+        INSTALLED: ('STRING_DEP_INSTALLED', 'installiert'),
+        REPO: ('STRING_DEP_REPO', 'Repository'),
+        AUR: ('STRING_DEP_AUR', 'AUR'),
+        MISSING: ('STRING_DEP_MISSING', 'nicht gefunden'),
+        UNRESOLVED: ('STRING_DEP_UNRESOLVED', 'nicht geprüft'),
+    }
+
+    def __init__(self, parent, root):
+        super().__init__(transient_for=parent, modal=True)
+        self.set_title(_('STRING_DEPENDENCIES_TITLE', package=root.name))
+        self.set_default_size(600, 500)
+        
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        vbox.set_margin_top(15)
+        vbox.set_margin_bottom(15)
+        vbox.set_margin_start(15)
+        vbox.set_margin_end(15)
+        
+        aur_count, missing_count, unresolved_count = self.count_nodes(root)
+        summary = Gtk.Label(label=_('STRING_DEP_SUMMARY', aur=aur_count, missing=missing_count))
+        summary.set_halign(Gtk.Align.START)
+        summary.set_wrap(True)
+        vbox.append(summary)
+        if unresolved_count:
+            unresolved = Gtk.Label(label=_('STRING_DEP_UNRESOLVED_SUMMARY', count=unresolved_count))
+            unresolved.set_halign(Gtk.Align.START)
+            unresolved.set_wrap(True)
+            unresolved.add_css_class("dim-label")
+            vbox.append(unresolved)
+        
+        root_store = Gio.ListStore(item_type=DependencyNodeObject)
+        root_store.append(DependencyNodeObject(root))
+        tree_model = Gtk.TreeListModel.new(root_store, False, True, self.create_child_model)
+        
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_row_setup)
+        factory.connect("bind", self.on_row_bind)
+        
+        tree_view = Gtk.ListView(model=Gtk.NoSelection(model=tree_model), factory=factory)
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(tree_view)
+        vbox.append(scrolled)
+        
+        self.get_content_area().append(vbox)
+        self.add_button(STRINGS.get('STRING_CLOSE_BUTTON', 'Schließen'), Gtk.ResponseType.CLOSE)
+        self.connect("response", lambda dialog, response: dialog.destroy())
+
+    def count_nodes(self, root):
+        """AUR packages to build, missing and unchecked dependencies below root"""
+        seen = set()
+        stack = [root]
+        aur_count = 0
+        missing_count = 0
+        unresolved_count = 0
+        while stack:
+            node = stack.pop()
+            if node.name in seen:
+                continue
+            seen.add(node.name)
+            if node is not root and node.kind == AUR:
+                aur_count += 1
+            elif node.kind == MISSING:
+                missing_count += 1
+            elif node.kind == UNRESOLVED:
+                unresolved_count += 1
+            stack.extend(node.depends)
+            stack.extend(node.makedepends)
+        return aur_count, missing_count, unresolved_count
+
+    def create_child_model(self, item):
+        children = item.children()
+        if not children:
+            return None
+        store = Gio.ListStore(item_type=DependencyNodeObject)
+        store.splice(0, 0, children)
+        return store
+
+    def on_row_setup(self, factory, list_item):
+        row_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        name_label = Gtk.Label()
+        name_label.set_halign(Gtk.Align.START)
+        info_label = Gtk.Label()
+        info_label.add_css_class("dim-label")
+        info_label.set_halign(Gtk.Align.START)
+        row_box.append(name_label)
+        row_box.append(info_label)
+        
+        expander = Gtk.TreeExpander()
+        expander.set_child(row_box)
+        list_item.set_child(expander)
+
+    def on_row_bind(self, factory, list_item):
+        tree_row = list_item.get_item()
+        expander = list_item.get_child()
+        expander.set_list_row(tree_row)
+        item = tree_row.get_item()
+        node = item.node
+        
+        row_box = expander.get_child()
+        name_label = row_box.get_first_child()
+        info_label = name_label.get_next_sibling()
+        
+        name = GLib.markup_escape_text(node.name)
+        name_label.set_markup(f"<b>{name}</b>" if node.kind == AUR else name)
+        
+        string_key, fallback = self.KIND_LABELS[node.kind]
+        info = [STRINGS.get(string_key, fallback)]
+        if node.satisfied_by:
+            info.append(_('STRING_DEP_PROVIDED_BY', package=node.satisfied_by))
+        if item.build_only:
+            info.append(STRINGS.get('STRING_DEP_BUILD_ONLY', 'nur zum Bauen'))
+        info_label.set_text(", ".join(info))
+
+
+class UninstallImpactDialog(Gtk.Dialog):
+    """Packages affected by an uninstall, shown before the terminal opens"""
+
+    def __init__(self, parent, package_name, removed, broken, optional):
+        super().__init__(transient_for=parent, modal=True)
+        self.set_title(_('STRING_IMPACT_TITLE', package=package_name))
+        self.set_default_size(500, 400)
+        
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=15)
+        vbox.set_margin_top(15)
+        vbox.set_margin_bottom(15)
+        vbox.set_margin_start(15)
+        vbox.set_margin_end(15)
+        
+        if broken:
+            self.append_section(vbox, STRINGS.get('STRING_IMPACT_BROKEN', 'Diese Pakete verlieren benötigte Abhängigkeiten:'),
+                                [f"{name}: {', '.join(needs)}" for name, needs in sorted(broken.items())])
+        if removed:
+            self.append_section(vbox, STRINGS.get('STRING_IMPACT_REMOVED', 'Diese Abhängigkeiten werden nicht mehr benötigt und ebenfalls entfernt:'),
+                                removed)
+        if optional:
+            self.append_section(vbox, STRINGS.get('STRING_IMPACT_OPTIONAL', 'Diese Pakete verlieren optionale Funktionen:'),
+                                [f"{name}: {', '.join(needs)}" for name, needs in sorted(optional.items())])
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(vbox)
+        self.get_content_area().append(scrolled)
+        
+        self.add_button(STRINGS.get('STRING_CANCEL_BUTTON', 'Abbrechen'), Gtk.ResponseType.CANCEL)
+        uninstall_button = self.add_button(STRINGS.get('STRING_UNINSTALL_BUTTON', 'Deinstallieren'), Gtk.ResponseType.OK)
+        uninstall_button.add_css_class("destructive-action")
+
+    def append_section(self, vbox, heading, lines):
+        heading_label = Gtk.Label()
+        heading_label.set_markup(f"<b>{GLib.markup_escape_text(heading)}</b>")
+        heading_label.set_halign(Gtk.Align.START)
+        heading_label.set_wrap(True)
+        vbox.append(heading_label)
+        
+        lines_label = Gtk.Label(label="\n".join(lines))
+        lines_label.set_halign(Gtk.Align.START)
+        lines_label.set_selectable(True)
+        lines_label.set_wrap(True)
+        vbox.append(lines_label)
+
+
+class PKGBUILDDialog(Gtk.Dialog):
+    """PKGBUILD of an AUR package and its changes since the installed revision"""
+
+    def __init__(self, parent, pkgbase, pkgbuild, diff):
+        super().__init__(transient_for=parent, modal=True)
+        self.set_title(_('STRING_PKGBUILD_TITLE', package=pkgbase))
+        self.set_default_size(700, 600)
+        
+        if diff is None:
+            diff = STRINGS.get('STRING_PKGBUILD_NOT_INSTALLED', 'Für dieses Paket wurde noch keine Installation aufgezeichnet.')
+        elif not diff:
+            diff = STRINGS.get('STRING_PKGBUILD_UNCHANGED', 'Keine Änderungen seit der installierten Version.')
+        
+        stack = Gtk.Stack()
+        stack.add_titled(self.create_text_page(pkgbuild), "pkgbuild", "PKGBUILD")
+        stack.add_titled(self.create_text_page(diff), "diff",
+                         STRINGS.get('STRING_PKGBUILD_CHANGES', 'Änderungen seit der Installation'))
+        
+        switcher = Gtk.StackSwitcher(stack=stack)
+        switcher.set_halign(Gtk.Align.CENTER)
+        
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        vbox.set_margin_top(15)
+        vbox.set_margin_bottom(15)
+        vbox.set_margin_start(15)
+        vbox.set_margin_end(15)
+        vbox.append(switcher)
+        vbox.append(stack)
+        
+        self.get_content_area().append(vbox)
+        self.add_button(STRINGS.get('STRING_CLOSE_BUTTON', 'Schließen'), Gtk.ResponseType.CLOSE)
+        self.connect("response", lambda dialog, response: dialog.destroy())
+
+    def create_text_page(self, text):
+        text_view = Gtk.TextView()
+        text_view.set_editable(False)
+        text_view.set_cursor_visible(False)
+        text_view.set_monospace(True)
+        text_view.get_buffer().set_text(text)
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_hexpand(True)
+        scrolled.set_child(text_view)
+        return scrolled
+
+
 class MainWindow(Gtk.ApplicationWindow):
     def __init__(self, force_dialog=False):
         super().__init__()
@@ -391,6 +691,10 @@ class MainWindow(Gtk.ApplicationWindow):
         self.search_entry.set_placeholder_text(STRINGS.get('STRING_SEARCH_PLACEHOLDER', 'Suchbegriff eingeben...'))
         self.search_entry.set_size_request(300, -1)
         self.search_entry.connect("activate", self.on_search)
+        self.search_entry.connect("changed", self.on_search_changed)
+        self.completer = NameCompleter()
+        self.completion_suppressed = False
+        self.completion_popover = self.create_completion_popover()
 
         search_button = Gtk.Button(label=STRINGS.get('STRING_SEARCH_BUTTON', 'Suchen'))
         search_button.set_name("search-button")
@@ -419,6 +723,13 @@ class MainWindow(Gtk.ApplicationWindow):
         self.update_button.connect("clicked", self.on_update_aur_clicked)
         self.style_accent_button(self.update_button)
         
+        self.index_button = Gtk.Button(label=STRINGS.get('STRING_REFRESH_INDEX', 'Paketindex aktualisieren'))
+        self.index_button.set_name("index-button")
+        self.index_button.add_css_class("suggested-action")
+        self.index_button.connect("clicked", self.on_refresh_index_clicked)
+        self.style_accent_button(self.index_button)
+        
+        top_buttons_box.append(self.index_button)
         top_buttons_box.append(self.cleanup_button)
         top_buttons_box.append(self.update_button)
         
@@ -436,12 +747,27 @@ class MainWindow(Gtk.ApplicationWindow):
         scrolled_results = Gtk.ScrolledWindow()
         scrolled_results.set_vexpand(True)
         scrolled_results.set_hexpand(True)
-        scrolled_results.add_css_class("card")
 
-        self.results_list = Gtk.ListBox()
+        # Model-backed list, only the visible rows have widgets which are
+        # recycled while scrolling
+        self.results_store = Gio.ListStore(item_type=PackageObject)
+        self.results_selection = Gtk.SingleSelection(model=self.results_store)
+        self.results_selection.set_autoselect(False)
+        self.results_selection.set_can_unselect(True)
+        self.results_selection_handler = self.results_selection.connect("notify::selected", self.on_package_selected)
+        
+        results_factory = Gtk.SignalListItemFactory()
+        results_factory.connect("setup", self.on_result_row_setup)
+        results_factory.connect("bind", self.on_result_row_bind)
+        
+        self.results_list = Gtk.ListView(model=self.results_selection, factory=results_factory)
         self.results_list.add_css_class("navigation-sidebar")
-        self.results_list.connect("row-selected", self.on_package_selected)
         scrolled_results.set_child(self.results_list)
+        
+        self.results_stack = Gtk.Stack()
+        self.results_stack.add_css_class("card")
+        self.results_stack.add_named(scrolled_results, "results")
+        self.results_stack.add_named(self.create_empty_state(), "empty")
 
         details_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
         details_box.add_css_class("card")
@@ -478,6 +804,9 @@ class MainWindow(Gtk.ApplicationWindow):
         self.details_label.set_halign(Gtk.Align.START)
         self.details_label.set_valign(Gtk.Align.START)
         self.details_grid.attach(self.details_label, 0, 0, 2, 1)
+        # Labelled rows by field, created once and reused for every package
+        self.details_rows = {}
+        self.create_details_rows()
 
         action_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
         action_box.set_margin_top(12)
@@ -514,9 +843,23 @@ class MainWindow(Gtk.ApplicationWindow):
         self.aur_button.set_sensitive(False)
         self.style_accent_button(self.aur_button)
 
+        self.dependencies_button = Gtk.Button(label=STRINGS.get('STRING_DEPENDENCIES_BUTTON', 'Abhängigkeiten'))
+        self.dependencies_button.set_name("dependencies-button")
+        self.dependencies_button.connect("clicked", self.on_dependencies_clicked)
+        self.dependencies_button.set_sensitive(False)
+        self.style_accent_button(self.dependencies_button)
+
+        self.pkgbuild_button = Gtk.Button(label="PKGBUILD")
+        self.pkgbuild_button.set_name("pkgbuild-button")
+        self.pkgbuild_button.connect("clicked", self.on_pkgbuild_clicked)
+        self.pkgbuild_button.set_sensitive(False)
+        self.style_accent_button(self.pkgbuild_button)
+
         button_row.append(self.install_button)
         button_row.append(self.uninstall_button)
         button_row.append(self.aur_button)
+        button_row.append(self.dependencies_button)
+        button_row.append(self.pkgbuild_button)
         button_row.set_halign(Gtk.Align.START)
 
         action_box.append(self.status_button)
@@ -526,7 +869,7 @@ class MainWindow(Gtk.ApplicationWindow):
         details_box.append(scrolled_details)
         details_box.append(action_box)
 
-        paned.set_start_child(scrolled_results)
+        paned.set_start_child(self.results_stack)
         paned.set_resize_start_child(False)
         paned.set_end_child(details_box)
         paned.set_position(320)
@@ -541,6 +884,42 @@ class MainWindow(Gtk.ApplicationWindow):
         self.set_child(main_box)
         self.selected_package = None
         self.selected_package_full = None
+        self.details_generation = 0
+        self.details_processes = {}
+        self.details_lock = threading.Lock()
+        # name -> AUR record (None if unknown) looked up for queued prefetches
+        self.prefetched_aur_records = OrderedDict()
+        
+        # Every search gets a generation, only the newest one may render
+        self.search_generation = 0
+        self.search_process = None
+        self.search_debounce_id = 0
+        self.search_lock = threading.Lock()
+        self.search_cache = SearchCache()
+        self.result_narrower = ResultNarrower()
+        
+        # Local AUR index, loaded in the background and refreshed when stale
+        self.aur_index = AURIndex()
+        threading.Thread(target=self.load_aur_index, daemon=True).start()
+        self.aur_client = AURClient()
+        self.sync_db = SyncDatabase()
+        self.local_db = LocalDatabase()
+        self.reverse_dependencies = ReverseDependencyIndex(self.local_db)
+        self.pkgbuild_mirror = PKGBUILDMirror()
+        self.local_db_monitor = None
+        self.pacman_lock_monitor = None
+        self.local_db_reload_id = 0
+        self.terminal_monitors = set()
+        # Set once the first load finished, installed states are unknown before
+        self.local_db_ready = threading.Event()
+        self.details_cache = DetailsCache(self.local_db)
+        threading.Thread(target=self.load_local_db, daemon=True).start()
+        self.watch_local_db()
+        self.dependency_resolver = DependencyResolver(self.local_db, self.sync_db, self.lookup_aur_packages,
+                                                      self.lookup_aur_providers)
+        self.details_prefetcher = Prefetcher(self.load_package_details, self.details_cache)
+        threading.Thread(target=self.load_sync_db, daemon=True).start()
+        GLib.timeout_add_seconds(60 * 60, self.on_index_refresh_timer)
         
         if DisclaimerDialog.should_show():
             GLib.idle_add(self.show_disclaimer_dialog)
@@ -656,11 +1035,11 @@ class MainWindow(Gtk.ApplicationWindow):
             background-color: rgba(0, 0, 0, 0.1);
         }}
 
-        listbox row {{
+        listbox row, listview row {{
             padding: 8px;
         }}
 
-        listbox row:selected {{
+        listbox row:selected, listview row:selected {{
             background-color: @theme_selected_bg_color;
         }}
 
@@ -670,7 +1049,7 @@ class MainWindow(Gtk.ApplicationWindow):
             background: transparent;
         }}
 
-        listbox {{
+        listbox, listview {{
             border: none;
             background: transparent;
         }}
@@ -740,302 +1119,762 @@ class MainWindow(Gtk.ApplicationWindow):
         header_box.append(subtitle)
         return header_box
 
+    def create_completion_popover(self):
+        popover = Gtk.Popover()
+        popover.set_parent(self.search_entry)
+        popover.set_position(Gtk.PositionType.BOTTOM)
+        popover.set_has_arrow(False)
+        popover.set_autohide(False)
+        popover.set_can_focus(False)
+        
+        self.completion_list = Gtk.ListBox()
+        self.completion_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        self.completion_list.connect("row-activated", self.on_completion_activated)
+        popover.set_child(self.completion_list)
+        
+        # Capture phase, the entry would handle the arrow keys and Return itself
+        key_controller = Gtk.EventControllerKey()
+        key_controller.set_propagation_phase(Gtk.PropagationPhase.CAPTURE)
+        key_controller.connect("key-pressed", self.on_search_entry_key_pressed)
+        self.search_entry.add_controller(key_controller)
+        return popover
+
+    def update_completion(self, text):
+        """Show the best package names starting with the typed text"""
+        names = []
+        if text.strip() and len(text.split()) == 1 and not has_filters(text):
+            names = self.completer.complete(text)
+        if not names or names == [text.strip().lower()]:
+            self.completion_popover.popdown()
+            return
+        
+        child = self.completion_list.get_first_child()
+        while child is not None:
+            next_child = child.get_next_sibling()
+            self.completion_list.remove(child)
+            child = next_child
+        for name in names:
+            label = Gtk.Label(label=name)
+            label.set_halign(Gtk.Align.START)
+            row = Gtk.ListBoxRow()
+            row.set_child(label)
+            row.name = name
+            self.completion_list.append(row)
+        self.completion_popover.popup()
+
+    def on_search_entry_key_pressed(self, controller, keyval, keycode, state):
+        if not self.completion_popover.get_visible():
+            return False
+        
+        if keyval == Gdk.KEY_Escape:
+            self.completion_popover.popdown()
+            return True
+        if keyval in (Gdk.KEY_Down, Gdk.KEY_Up):
+            row = self.completion_list.get_selected_row()
+            index = row.get_index() if row else -1
+            index += 1 if keyval == Gdk.KEY_Down else -1
+            row = self.completion_list.get_row_at_index(index)
+            if row is not None:
+                self.completion_list.select_row(row)
+            elif index < 0:
+                self.completion_list.unselect_all()
+            return True
+        if keyval in (Gdk.KEY_Return, Gdk.KEY_KP_Enter):
+            row = self.completion_list.get_selected_row()
+            if row is not None:
+                self.accept_completion(row.name)
+                return True
+        return False
+
+    def on_completion_activated(self, listbox, row):
+        self.accept_completion(row.name)
+
+    def accept_completion(self, name):
+        self.completion_popover.popdown()
+        self.completion_suppressed = True
+        self.search_entry.set_text(name)
+        self.completion_suppressed = False
+        self.search_entry.set_position(-1)
+        self.on_search(None)
+
+    def rebuild_completion(self):
+        """Rebuild the name completion from the sync databases and the AUR index"""
+        completer = NameCompleter()
+        completer.build(self.sync_db.packages, self.aur_index.packages)
+        self.completer = completer
+        GLib.idle_add(self.index_button.set_tooltip_text,
+                      _('STRING_COMPLETION_STATS', count=len(completer),
+                        size=f"{completer.memory_usage() / 1024:.0f}"))
+
+    def load_sync_db(self):
+        try:
+            self.sync_db.load()
+            self.rebuild_completion()
+        except Exception as e:
+            print(f"Error loading sync databases: {e}")
+
+    def on_search_changed(self, entry):
+        """Search as you type, restarting the debounce window on every keystroke"""
+        if self.search_debounce_id:
+            GLib.source_remove(self.search_debounce_id)
+            self.search_debounce_id = 0
+        
+        if not self.completion_suppressed:
+            self.update_completion(entry.get_text())
+        
+        if not entry.get_text().strip():
+            self.cancel_search()
+            return
+        
+        self.search_debounce_id = GLib.timeout_add(SEARCH_DEBOUNCE_MS, self.on_search_debounced)
+
+    def on_search_debounced(self):
+        self.search_debounce_id = 0
+        self.on_search(None)
+        return False
+
+    def cancel_search(self):
+        """Supersede the running search and kill its subprocess"""
+        with self.search_lock:
+            self.search_generation += 1
+            process = self.search_process
+            self.search_process = None
+        
+        if process and process.poll() is None:
+            try:
+                process.kill()
+            except:
+                pass
+        return self.search_generation
+
+    def is_current_search(self, generation):
+        return generation == self.search_generation
+
     def on_search(self, widget):
+        if self.search_debounce_id:
+            GLib.source_remove(self.search_debounce_id)
+            self.search_debounce_id = 0
+        if widget is not None:
+            self.completion_popover.popdown()
+        
         query = self.search_entry.get_text()
         if not query.strip():
             self.status_label.set_text(STRINGS.get('STRING_ENTER_SEARCH', 'Bitte einen Suchbegriff eingeben'))
             return
+        
+        try:
+            _text, filters = parse_query(query)
+        except FilterError as e:
+            self.status_label.set_text(f"{STRINGS.get('STRING_FILTER_ERROR', 'Ungültiger Filter:')} {str(e)}")
+            return
+        if filters and not self.aur_index.loaded:
+            self.status_label.set_text(STRINGS.get('STRING_FILTER_NEEDS_INDEX', 'Filter sind erst verfügbar, wenn der Paketindex geladen ist'))
+            return
+        
+        generation = self.cancel_search()
 
         self.status_label.set_text(STRINGS.get('STRING_SEARCHING', 'Suche läuft...'))
-        self.results_list.remove_all()
-        self.details_label.set_text(STRINGS.get('STRING_SELECT_PACKAGE', 'Wählen Sie ein Paket aus der Liste'))
+        self.results_store.remove_all()
+        self.results_stack.set_visible_child_name("results")
+        self.show_details_message(STRINGS.get('STRING_SELECT_PACKAGE', 'Wählen Sie ein Paket aus der Liste'))
 
         self.install_button.set_sensitive(False)
         self.uninstall_button.set_sensitive(False)
         self.aur_button.set_sensitive(False)
+        self.dependencies_button.set_sensitive(False)
+        self.pkgbuild_button.set_sensitive(False)
 
-        thread = threading.Thread(target=self.search_aur, args=(query,))
+        # Narrowing, cache lookups and ranking all run in the search thread
+        thread = threading.Thread(target=self.search_aur, args=(query, generation))
         thread.daemon = True
         thread.start()
 
-    def search_aur(self, query):
+    def load_aur_index(self):
+        """Load the cached AUR index and refresh it if it is missing or stale"""
         try:
-            result = subprocess.run(
-                ['yay', '-Ss', query],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            if self.aur_index.exists():
+                self.aur_index.load()
+                self.rebuild_completion()
+                # Results remembered so far came from yay/RPC, the index answers from now on
+                self.search_cache.clear()
+                self.result_narrower.forget()
+            if self.aur_index.is_stale():
+                self.refresh_aur_index()
+        except Exception as e:
+            print(f"Error loading AUR index: {e}")
 
-            packages = self.parse_yay_output(result.stdout)
+    def refresh_aur_index(self):
+        GLib.idle_add(self.index_button.set_sensitive, False)
+        GLib.idle_add(self.set_status, STRINGS.get('STRING_INDEX_REFRESHING', 'Aktualisiere Paketindex...'))
+        try:
+            count = self.aur_index.refresh()
+            self.rebuild_completion()
+            self.search_cache.clear()
+            self.result_narrower.forget()
+            GLib.idle_add(self.set_status, _('STRING_INDEX_REFRESHED', count=count))
+        except Exception as e:
+            GLib.idle_add(self.set_status, f"{STRINGS.get('STRING_INDEX_ERROR', 'Paketindex konnte nicht aktualisiert werden:')} {str(e)}")
+        finally:
+            GLib.idle_add(self.index_button.set_sensitive, True)
 
-            GLib.idle_add(self.display_results, packages, query)
-        except subprocess.TimeoutExpired:
-            GLib.idle_add(self.set_status, STRINGS.get('STRING_SEARCH_TIMEOUT', 'Suche hat zu lange gedauert'))
+    def on_refresh_index_clicked(self, button):
+        threading.Thread(target=self.refresh_aur_index, daemon=True).start()
+
+    def on_index_refresh_timer(self):
+        """Scheduled refresh, runs hourly and only downloads a stale index"""
+        if self.aur_index.is_stale():
+            threading.Thread(target=self.refresh_aur_index, daemon=True).start()
+        return True
+
+    def search_aur(self, query, generation):
+        try:
+            # A refined query is answered by filtering the complete previous result
+            narrowed = self.result_narrower.narrow(query)
+            if narrowed or (narrowed is not None and not self.aur_index.loaded):
+                self.show_ranked_results(narrowed, query, generation)
+                return
+
+            # Cache hits render instantly, stale hits are revalidated afterwards
+            cached_packages = None
+            cached = self.search_cache.get(query)
+            if cached is not None:
+                cached_packages, fresh = cached
+                if fresh:
+                    self.result_narrower.remember(query, cached_packages)
+                    suggestions = None if cached_packages else self.suggest_names(query)
+                    self.show_ranked_results(cached_packages, query, generation, suggestions)
+                    return
+                self.show_ranked_results(cached_packages, query, generation)
+
+            filtered = has_filters(query)
+            if filtered:
+                # Filters work on AUR metadata, only the local index has it
+                sources = [SearchSource('aur-index', self.aur_index.search)]
+            else:
+                sources = [SearchSource('sync', self.search_sync_repos, rank=0)]
+                if self.aur_index.loaded:
+                    # A stale index is refreshed in the background, not bypassed
+                    sources.append(SearchSource('aur-index', self.aur_index.search, rank=1))
+                else:
+                    sources.append(SearchSource(
+                        'aur-rpc', lambda q: self.search_aur_remote(q, generation), rank=1))
+                sources.append(SearchSource('installed', self.local_db.search, annotates=True))
+
+            # Local sources answer within moments of each other, only the
+            # final list is ranked unless the AUR has to be asked remotely
+            progressive = not filtered and not self.aur_index.loaded
+
+            def on_update(packages, latencies):
+                # Revalidating a cached result only swaps in the final list
+                if progressive and cached_packages is None and packages and 'aur-rpc' not in latencies:
+                    self.show_ranked_results(packages, query, generation)
+
+            result = search_sources(query, sources, on_update,
+                                    lambda: not self.is_current_search(generation))
+            if result is None:
+                return
+            packages, latencies, complete = result
+            GLib.idle_add(self.show_search_latencies, latencies, generation)
+
+            # Partial results (a source failed) are shown but never cached,
+            # only answers that needed the AUR RPC or yay are kept on disk
+            if complete:
+                self.search_cache.put(query, packages, persist='aur-rpc' in latencies)
+                if self.is_current_search(generation):
+                    self.result_narrower.remember(query, packages)
+            if packages and packages == cached_packages:
+                return
+            
+            suggestions = None if packages else self.suggest_names(query)
+            self.show_ranked_results(packages, query, generation, suggestions)
         except Exception as e:
-            GLib.idle_add(self.set_status, f"Fehler: {str(e)}")
+            if self.is_current_search(generation):
+                GLib.idle_add(self.set_status, f"Fehler: {str(e)}")
+
+    def suggest_names(self, query):
+        """Offer similar names instead of an empty list, e.g. for typos"""
+        if has_filters(query) or not self.aur_index.loaded:
+            return None
+        return [pkg['name'] for pkg in self.aur_index.suggest(query)]
+
+    def search_sync_repos(self, query):
+        # load() only parses databases that changed since the last search
+        if self.sync_db.load():
+            threading.Thread(target=self.rebuild_completion, daemon=True).start()
+        return self.sync_db.search(query)
+
+    def search_aur_remote(self, query, generation):
+        """AUR RPC search, yay -Ss when the RPC refuses the query"""
+        try:
+            # No backoff, yay answers right away when the AUR is unreachable
+            return self.aur_client.search(query, max_retries=0)
+        except AURRpcError as e:
+            # Too short or too broad for the RPC, or offline
+            print(f"AUR RPC search failed, falling back to yay: {e}")
+        try:
+            # Merged with the other sources, on_update renders the combined list
+            return self.stream_yay_search(query, generation)
+        except subprocess.TimeoutExpired:
+            if self.is_current_search(generation):
+                GLib.idle_add(self.set_status, STRINGS.get('STRING_SEARCH_TIMEOUT', 'Suche hat zu lange gedauert'))
+            raise
 
-    def parse_yay_output(self, output):
-        packages = []
-        lines = output.strip().split('\n')
-
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
-            if line.startswith("aur/"):
-                parts = line.split()
-                if len(parts) >= 2:
-                    name = parts[0].replace("aur/", "")
-                    version = parts[1] if len(parts) > 1 else ""
-
-                    description = ""
-                    if i + 1 < len(lines) and lines[i + 1].startswith("    "):
-                        description = lines[i + 1].strip()
-                        i += 1
-
-                    packages.append({
-                        'name': name,
-                        'version': version,
-                        'description': description
-                    })
-            elif line.startswith("    ") and not line.strip().startswith("("):
-                stripped = line.strip()
-                parts = stripped.split()
-                
-                if len(parts) >= 2:
-                    potential_version = parts[1]
-                    is_version = any(c.isdigit() for c in potential_version) or potential_version.startswith('r')
-                    
-                    if is_version:
-                        name = parts[0]
-                        version = potential_version
-                        
-                        description = ""
-                        if i + 1 < len(lines) and lines[i + 1].startswith("    "):
-                            next_line = lines[i + 1].strip()
-                            next_parts = next_line.split()
-                            if len(next_parts) > 0:
-                                is_next_package = (len(next_parts) > 1 and 
-                                                 any(c.isdigit() for c in next_parts[1]))
-                                if not is_next_package:
-                                    description = next_line
-                                    i += 1
-                        
-                        packages.append({
-                            'name': name,
-                            'version': version,
-                            'description': description
-                        })
-
-            i += 1
+    def show_search_latencies(self, latencies, generation):
+        """Per-source search times as tooltip of the status label"""
+        if not self.is_current_search(generation):
+            return False
+        parts = []
+        for name, latency in sorted(latencies.items()):
+            if latency is None:
+                parts.append(f"{name}: –")
+            else:
+                parts.append(f"{name}: {latency * 1000:.0f} ms")
+        self.status_label.set_tooltip_text(", ".join(parts))
+        return False
 
-        return packages
-    
-    def sort_packages_by_relevance(self, packages, query):
-        """Sort packages by relevance to the query"""
-        query_lower = query.lower()
+    def stream_yay_search(self, query, generation):
+        """Read yay -Ss line by line, stopping early once the search is superseded.
+
+        Returns all packages, or None if the search was superseded.
+        """
+        process = subprocess.Popen(
+            ['yay', '-Ss', query],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+        with self.search_lock:
+            superseded = not self.is_current_search(generation)
+            if not superseded:
+                self.search_process = process
+        if superseded:
+            process.kill()
+            process.wait()
+            return None
         
-        def relevance_score(pkg):
-            name_lower = pkg['name'].lower()
-            
-            if name_lower == query_lower:
-                return (0, pkg['name'])
-            
-            if name_lower.startswith(query_lower):
-                return (1, pkg['name'])
-            
-            if query_lower in name_lower:
-                pos = name_lower.find(query_lower)
-                return (2 + pos/1000, pkg['name'])
-            
-            desc_lower = pkg['description'].lower()
-            if query_lower in desc_lower:
-                pos = desc_lower.find(query_lower)
-                return (100 + pos/1000, pkg['name'])
-            
-            return (1000, pkg['name'])
+        timed_out = threading.Event()
+        def on_timeout():
+            timed_out.set()
+            process.kill()
+        timer = threading.Timer(SEARCH_TIMEOUT, on_timeout)
+        timer.start()
         
-        return sorted(packages, key=relevance_score)
+        packages = []
+        try:
+            for pkg in iter_yay_packages(process.stdout):
+                if not self.is_current_search(generation):
+                    break
+                packages.append(pkg)
+        finally:
+            timer.cancel()
+            process.stdout.close()
+            process.wait()
+        
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(['yay', '-Ss', query], SEARCH_TIMEOUT)
+        if not self.is_current_search(generation):
+            return None
+        return packages
 
-    def display_results(self, packages, query):
-        if not packages:
-            row = Gtk.ListBoxRow()
-            row.set_selectable(False)
-            box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=15)
-            box.set_margin_top(40)
-            box.set_margin_bottom(40)
-            box.set_margin_start(20)
-            box.set_margin_end(20)
-            box.set_halign(Gtk.Align.CENTER)
-            box.set_valign(Gtk.Align.CENTER)
-            
-            icon_label = Gtk.Label(label="")
-            icon_label.add_css_class("title-1")
-            box.append(icon_label)
-            
-            message = Gtk.Label(label=STRINGS.get('STRING_NO_RESULTS', 'Keine Ergebnisse gefunden'))
-            message.add_css_class("title-3")
-            message.set_wrap(True)
-            box.append(message)
-            
-            detail = Gtk.Label(label=STRINGS.get('STRING_NO_RESULTS_DETAIL', 'Keine Pakete gefunden. Versuche einen anderen Suchbegriff.'))
-            detail.set_wrap(True)
-            detail.set_halign(Gtk.Align.CENTER)
-            detail.add_css_class("dim-label")
-            box.append(detail)
-            
-            row.set_child(box)
-            self.results_list.append(row)
+    def sort_packages_by_relevance(self, packages, query):
+        """All packages, most relevant first"""
+        # Filters already decided what matches, rank by the free text only
+        text, _filters = parse_query(query)
+        return rank_packages(packages, text)
+
+    def show_ranked_results(self, packages, query, generation, suggestions=None):
+        """Rank in the calling search thread, the main loop only swaps in the rows"""
+        if not self.is_current_search(generation):
+            return
+        ranked = self.sort_packages_by_relevance(packages, query) if packages else []
+        # The list view only binds the visible rows, every match gets one
+        items = [PackageObject(pkg) for pkg in ranked]
+        GLib.idle_add(self.display_results, items, generation, suggestions)
+
+    def display_results(self, items, generation=None, suggestions=None):
+        """Show the ranked result rows"""
+        # Drop results of a search that was superseded while queued
+        if generation is not None and not self.is_current_search(generation):
+            return False
+        
+        if not items:
+            self.results_store.remove_all()
+            self.show_empty_state(suggestions)
             self.status_label.set_text(STRINGS.get('STRING_SEARCH_COMPLETE_EMPTY', 'Suche abgeschlossen - keine Ergebnisse'))
             return
 
-        sorted_packages = self.sort_packages_by_relevance(packages, query)
+        self.replace_results(items)
+        self.results_stack.set_visible_child_name("results")
+        
+        # The first rows are the likely clicks, have their details ready
+        self.details_prefetcher.cancel_pending()
+        self.prefetch_details([item.pkg['name'] for item in items[:PREFETCH_TOP]])
+
+        self.status_label.set_text(_('STRING_SEARCH_RESULTS', count=len(items)))
+
+    def create_empty_state(self):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=15)
+        box.set_margin_top(40)
+        box.set_margin_bottom(40)
+        box.set_margin_start(20)
+        box.set_margin_end(20)
+        box.set_halign(Gtk.Align.CENTER)
+        box.set_valign(Gtk.Align.CENTER)
+        
+        icon_label = Gtk.Label(label="")
+        icon_label.add_css_class("title-1")
+        box.append(icon_label)
+        
+        message = Gtk.Label(label=STRINGS.get('STRING_NO_RESULTS', 'Keine Ergebnisse gefunden'))
+        message.add_css_class("title-3")
+        message.set_wrap(True)
+        box.append(message)
+        
+        detail = Gtk.Label(label=STRINGS.get('STRING_NO_RESULTS_DETAIL', 'Keine Pakete gefunden. Versuche einen anderen Suchbegriff.'))
+        detail.set_wrap(True)
+        detail.set_halign(Gtk.Align.CENTER)
+        detail.add_css_class("dim-label")
+        box.append(detail)
+        
+        self.suggestions_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.suggestions_box.set_margin_top(10)
+        box.append(self.suggestions_box)
+        return box
 
-        for pkg in sorted_packages:
-            row = Gtk.ListBoxRow()
-            box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-            box.set_margin_top(8)
-            box.set_margin_bottom(8)
-            box.set_margin_start(10)
-            box.set_margin_end(10)
-
-            name_label = Gtk.Label()
-            name_label.set_markup(f"<b>{pkg['name']}</b> ({pkg['version']})")
-            name_label.set_wrap(True)
-            name_label.set_halign(Gtk.Align.START)
-
-            desc_label = Gtk.Label(label=pkg['description'])
-            desc_label.set_wrap(True)
-            desc_label.set_halign(Gtk.Align.START)
-            desc_label.add_css_class("dim-label")
-
-            box.append(name_label)
-            box.append(desc_label)
-            row.set_child(box)
-            self.results_list.append(row)
-
-        self.status_label.set_text(_('STRING_SEARCH_RESULTS', count=len(packages)))
-
-    def on_package_selected(self, listbox, row):
-        if row is None:
+    def show_empty_state(self, suggestions):
+        child = self.suggestions_box.get_first_child()
+        while child:
+            self.suggestions_box.remove(child)
+            child = self.suggestions_box.get_first_child()
+        
+        if suggestions:
+            self.suggestions_box.append(Gtk.Label(label=STRINGS.get('STRING_DID_YOU_MEAN', 'Meintest du:')))
+            for name in suggestions:
+                suggestion_button = Gtk.Button(label=name)
+                suggestion_button.add_css_class("flat")
+                suggestion_button.connect("clicked", self.on_suggestion_clicked, name)
+                self.suggestions_box.append(suggestion_button)
+        
+        self.results_stack.set_visible_child_name("empty")
+
+    def on_suggestion_clicked(self, button, name):
+        # Same as picking a completion, setting the text must not pop it up again
+        self.accept_completion(name)
+
+    def replace_results(self, items):
+        """Swap in the ranked rows in one change, the selected package stays selected"""
+        selected = self.selected_package
+        position = None
+        if selected:
+            position = next((i for i, item in enumerate(items) if item.pkg['name'] == selected), None)
+        
+        with self.results_selection.handler_block(self.results_selection_handler):
+            self.results_store.splice(0, self.results_store.get_n_items(), items)
+            if position is not None:
+                self.results_selection.set_selected(position)
+        if selected and position is None:
+            self.on_package_selected(self.results_selection, None)
+
+    def on_result_row_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        box.set_margin_top(8)
+        box.set_margin_bottom(8)
+        box.set_margin_start(10)
+        box.set_margin_end(10)
+
+        name_label = Gtk.Label()
+        name_label.set_wrap(True)
+        name_label.set_halign(Gtk.Align.START)
+
+        desc_label = Gtk.Label()
+        desc_label.set_wrap(True)
+        desc_label.set_halign(Gtk.Align.START)
+        desc_label.add_css_class("dim-label")
+
+        box.append(name_label)
+        box.append(desc_label)
+        list_item.set_child(box)
+
+    def on_result_row_bind(self, factory, list_item):
+        pkg = list_item.get_item().pkg
+        name_label = list_item.get_child().get_first_child()
+        desc_label = name_label.get_next_sibling()
+        
+        name = GLib.markup_escape_text(pkg['name'])
+        version = GLib.markup_escape_text(pkg['version'])
+        markup = f"<b>{name}</b> ({version})"
+        repository = pkg.get('repository')
+        if repository and repository not in ('aur', 'local'):
+            markup += f"  <small>{GLib.markup_escape_text(repository)}</small>"
+        # Looked up on every bind, cached results do not know about later installs
+        if self.local_db.is_installed(pkg['name']):
+            installed = GLib.markup_escape_text(STRINGS.get('STRING_RESULT_INSTALLED', 'installiert'))
+            markup += f"  <small><i>{installed}</i></small>"
+        name_label.set_markup(markup)
+        desc_label.set_text(pkg['description'])
+
+    def on_package_selected(self, selection, pspec):
+        item = selection.get_selected_item()
+        if item is None:
             self.selected_package = None
+            self.next_details_generation()
             self.install_button.set_sensitive(False)
             self.uninstall_button.set_sensitive(False)
             self.aur_button.set_sensitive(False)
+            self.dependencies_button.set_sensitive(False)
+            self.pkgbuild_button.set_sensitive(False)
             return
 
-        child = row.get_child()
-        labels = []
-        for widget in child:
-            if isinstance(widget, Gtk.Label):
-                labels.append(widget.get_text())
-
-        if labels:
-            name_with_version = labels[0]
-            package_name = name_with_version.split(' ')[0]
-
-            self.selected_package = package_name
+        package_name = item.pkg['name']
+        previous_package = self.selected_package
+        self.selected_package = package_name
+        generation = self.next_details_generation()
+        if previous_package and previous_package != package_name:
+            self.cancel_details_process(previous_package)
+        self.prefetch_neighbors(selection.get_selected())
+        self.fetch_package_details(package_name, generation)
+
+    def next_details_generation(self):
+        """Supersede all details requests still in flight"""
+        self.details_generation += 1
+        return self.details_generation
+
+    def fetch_package_details(self, package_name, generation):
+        def on_loaded(details, error):
+            GLib.idle_add(self.on_package_details_loaded, package_name, generation, details, error)
+        
+        # Usually prefetched already, otherwise fetched ahead of the queue
+        self.details_prefetcher.request(package_name, on_loaded)
 
-            thread = threading.Thread(target=self.fetch_package_details, args=(package_name,))
-            thread.daemon = True
-            thread.start()
+    def on_package_details_loaded(self, package_name, generation, details, error):
+        # Another row was selected meanwhile, keep the pane for that one
+        if generation != self.details_generation:
+            return False
+        
+        if error is not None:
+            self.show_details_message(f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(error)}")
+            return False
+        
+        details_data, installed = details
+        self.selected_package_full = details_data
+        self.display_package_details(details_data, installed, package_name)
+        return False
 
-    def fetch_package_details(self, package_name):
-        try:
-            result = subprocess.run(
+    def cancel_details_process(self, package_name):
+        """Kill the yay -Si run for a row that is no longer selected"""
+        with self.details_lock:
+            process = self.details_processes.get(package_name)
+        if process and process.poll() is None:
+            try:
+                process.kill()
+            except:
+                pass
+
+    def load_package_details(self, package_name):
+        """Return (details record, installed)"""
+        # Runs on the prefetch workers, wait rather than cache "not installed"
+        self.local_db_ready.wait()
+        cached = self.details_cache.get(package_name)
+        if cached is not None:
+            return cached
+
+        # Like pacman, a repository package wins over an AUR one of the same name
+        name = package_name.split('/')[-1]
+        record = self.sync_db.get(name)
+        if record is None and self.aur_index.loaded:
+            # Missing from the index too: yay -Si below, never one RPC per row
+            record = self.aur_index.get(name)
+        elif record is None:
+            record = self.fetch_aur_record(name)
+
+        if record is not None:
+            details_data = details_record(record)
+        else:
+            # Neither in the sync databases nor known to the AUR RPC.
+            # Untranslated output, labels are translated when rendering
+            process = subprocess.Popen(
                 ['yay', '-Si', package_name],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=10
+                env=C_LOCALE_ENV
             )
+            with self.details_lock:
+                self.details_processes[package_name] = process
+            try:
+                stdout, _stderr = process.communicate(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+            finally:
+                with self.details_lock:
+                    if self.details_processes.get(package_name) is process:
+                        del self.details_processes[package_name]
+            if process.returncode < 0:
+                # Killed because the selection moved on, do not cache partial output
+                raise InterruptedError(f"yay -Si {package_name} was cancelled")
+            details_data = parse_si_output(stdout)
+
+        installed = self.is_package_installed(package_name.split('/')[-1])
+        details = (details_data, installed)
+        self.details_cache.put(package_name, details, details_data['repository'])
+        return details
+
+    def fetch_aur_record(self, name):
+        """AUR record from the prefetch batch, or from a single RPC request"""
+        with self.details_lock:
+            if name in self.prefetched_aur_records:
+                # None when the AUR did not know it either
+                return self.prefetched_aur_records.pop(name)
+        try:
+            return self.aur_client.info_batch([name]).get(name)
+        except AURRpcError as e:
+            print(f"AUR RPC info failed, falling back to yay: {e}")
+            return None
+
+    def prefetch_neighbors(self, position):
+        """Prefetch the rows around the selection for arrow key navigation"""
+        names = []
+        for offset in (1, -1, 2, -2):
+            item = self.results_store.get_item(position + offset) if position + offset >= 0 else None
+            if item is not None:
+                names.append(item.pkg['name'])
+        self.prefetch_details(names, PRIORITY_NEIGHBOR)
+
+    def prefetch_details(self, names, priority=PRIORITY_VISIBLE):
+        """Queue details prefetches, AUR records are looked up in one request first"""
+        if self.aur_index.loaded:
+            self.details_prefetcher.prefetch(names, priority)
+            return
+        
+        with self.details_lock:
+            missing = [name for name in names
+                       if name.split('/')[-1] not in self.prefetched_aur_records
+                       and self.sync_db.get(name.split('/')[-1]) is None
+                       and self.details_cache.get(name) is None]
+        if not missing:
+            self.details_prefetcher.prefetch(names, priority)
+            return
+        
+        def lookup():
+            try:
+                records = self.aur_client.info_batch(missing)
+            except AURRpcError as e:
+                print(f"AUR RPC info failed, falling back to yay: {e}")
+            else:
+                with self.details_lock:
+                    for name in missing:
+                        name = name.split('/')[-1]
+                        self.prefetched_aur_records[name] = records.get(name)
+                    while len(self.prefetched_aur_records) > PREFETCH_RECORDS_MAX:
+                        self.prefetched_aur_records.popitem(last=False)
+            self.details_prefetcher.prefetch(names, priority)
+        
+        threading.Thread(target=lookup, daemon=True).start()
 
-            details = result.stdout
-            self.selected_package_full = details
+    def is_package_installed(self, package_name):
+        return self.local_db.is_installed(package_name)
 
-            installed = self.is_package_installed(package_name.split('/')[-1])
+    def load_local_db(self):
+        try:
+            self.local_db.load()
+        finally:
+            self.local_db_ready.set()
+        # Drop anything looked up while the installed states were unknown
+        self.details_cache.invalidate()
+        GLib.idle_add(self.refresh_install_state)
+
+    def watch_local_db(self):
+        """Reload the installed packages whenever pacman changes the local database"""
+        try:
+            directory = Gio.File.new_for_path(LOCAL_DB_DIR)
+            self.local_db_monitor = directory.monitor_directory(Gio.FileMonitorFlags.NONE, None)
+            self.local_db_monitor.connect("changed", self.on_local_db_changed)
+            # pacman -D rewrites desc files in place, which the directory
+            # monitor does not see; every transaction takes db.lck though
+            pacman_dir = Gio.File.new_for_path(os.path.dirname(LOCAL_DB_DIR))
+            self.pacman_lock_monitor = pacman_dir.monitor_directory(Gio.FileMonitorFlags.NONE, None)
+            self.pacman_lock_monitor.connect("changed", self.on_pacman_dir_changed)
+        except GLib.Error as e:
+            print(f"Error watching local database: {e}")
+
+    def on_pacman_dir_changed(self, monitor, file, other_file, event_type):
+        if file.get_basename() == "db.lck" and event_type == Gio.FileMonitorEvent.DELETED:
+            self.on_local_db_changed(monitor, file, other_file, event_type)
+
+    def on_local_db_changed(self, monitor, file, other_file, event_type):
+        # A transaction touches many entries, reload once it calms down
+        if self.local_db_reload_id:
+            GLib.source_remove(self.local_db_reload_id)
+        self.local_db_reload_id = GLib.timeout_add(LOCAL_DB_RELOAD_MS, self.on_local_db_reload)
+
+    def on_local_db_reload(self):
+        self.local_db_reload_id = 0
+        threading.Thread(target=self.reload_local_db, daemon=True).start()
+        return False
 
-            GLib.idle_add(self.display_package_details, details, installed, package_name)
-        except Exception as e:
-            GLib.idle_add(self.details_label.set_text, f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
+    def reload_local_db(self):
+        if self.local_db.load():
+            GLib.idle_add(self.refresh_install_state)
 
-    def is_package_installed(self, package_name):
-        try:
-            result = subprocess.run(
-                ['pacman', '-Q', package_name],
-                capture_output=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except:
-            return False
+    def refresh_install_state(self):
+        """Follow installs and removals done outside the app as well"""
+        if self.selected_package:
+            self.update_button_state(self.is_package_installed(self.selected_package.split('/')[-1]))
+        return False
 
-    def display_package_details(self, details, installed, package_name):
-        child = self.details_grid.get_first_child()
-        while child:
-            self.details_grid.remove(child)
-            child = self.details_grid.get_first_child()
+    def display_package_details(self, details_data, installed, package_name):
+        """Fill the pooled field rows, only labels whose text differs are touched"""
+        if self.details_label.get_visible():
+            self.details_label.set_visible(False)
         
-        formatted_data = self._parse_package_details(details)
+        for key, (key_label, value_label) in self.details_rows.items():
+            value = format_value(key, details_data.get(key))
+            if value:
+                if value_label.get_label() != value:
+                    value_label.set_label(value)
+                if not key_label.get_visible():
+                    key_label.set_visible(True)
+                    value_label.set_visible(True)
+            elif key_label.get_visible():
+                key_label.set_visible(False)
+                value_label.set_visible(False)
         
-        row = 0
-        for key, value in formatted_data.items():
-            key_label = Gtk.Label(label=key)
+        self.update_button_state(installed)
+        self.aur_button.set_sensitive(True)
+        self.dependencies_button.set_sensitive(True)
+        self.pkgbuild_button.set_sensitive(True)
+
+    def create_details_rows(self):
+        """One hidden row per details field, labels in the UI language"""
+        # Row 0 is the message label
+        for row, (key, string_key, fallback) in enumerate(DETAIL_FIELDS, start=1):
+            key_label = Gtk.Label()
             key_label.add_css_class("monospace")
             key_label.set_halign(Gtk.Align.END)
-            key_label.set_markup(f"<b>{key}</b>")
+            key_label.set_valign(Gtk.Align.START)
+            key_label.set_markup(f"<b>{GLib.markup_escape_text(STRINGS.get(string_key, fallback))}</b>")
+            key_label.set_visible(False)
             
-            value_label = Gtk.Label(label=value)
+            value_label = Gtk.Label()
             value_label.set_wrap(True)
             value_label.set_selectable(True)
             value_label.set_halign(Gtk.Align.START)
             value_label.set_hexpand(True)
+            value_label.set_visible(False)
             
             self.details_grid.attach(key_label, 0, row, 1, 1)
             self.details_grid.attach(value_label, 1, row, 1, 1)
-            row += 1
-        
-        self.update_button_state(installed)
-        self.aur_button.set_sensitive(True)
+            self.details_rows[key] = (key_label, value_label)
 
-    def _parse_package_details(self, details):
-        """Parse package details"""
-        lines = details.split('\n')
-        
-        # yay outputs localized field names based on system language
-        # We need to match both English and German field names
-        field_mappings = {
-            'Name': 'Name',
-            'Version': STRINGS.get('STRING_DETAIL_VERSION', 'Version'),
-            'Beschreibung': STRINGS.get('STRING_DETAIL_DESCRIPTION', 'Description'),
-            'Description': STRINGS.get('STRING_DETAIL_DESCRIPTION', 'Description'),
-            'URL': STRINGS.get('STRING_DETAIL_URL', 'URL'),
-            'Lizenzen': STRINGS.get('STRING_DETAIL_LICENSES', 'Licenses'),
-            'Licenses': STRINGS.get('STRING_DETAIL_LICENSES', 'Licenses'),
-            'Gruppen': STRINGS.get('STRING_DETAIL_GROUPS', 'Groups'),
-            'Groups': STRINGS.get('STRING_DETAIL_GROUPS', 'Groups'),
-        }
-        
-        # Values that indicate "none/empty" in different languages
-        empty_values = ['keine', 'nichts', 'none', 'nothing', 'aucun', 'aucune', 'ninguno', 'ninguna', 'nessuno', 'nessuna']
-        
-        formatted_data = {}
-        
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
-                
-            for yay_key, display_key in field_mappings.items():
-                if line.startswith(yay_key):
-                    if ':' in line:
-                        value = line.split(':', 1)[1].strip()
-                        # Skip empty/none values
-                        if value.lower() not in empty_values:
-                            formatted_data[display_key] = value
-                    break
-        
-        return formatted_data
+    def show_details_message(self, text):
+        """Show a message instead of the field rows"""
+        self.details_label.set_text(text)
+        self.details_label.set_visible(True)
+        for key_label, value_label in self.details_rows.values():
+            key_label.set_visible(False)
+            value_label.set_visible(False)
 
     def update_button_state(self, installed):
         """Update button states based on installation status"""
@@ -1062,9 +1901,7 @@ class MainWindow(Gtk.ApplicationWindow):
         self.uninstall_button.set_sensitive(False)
         self.status_label.set_text(_('STRING_INSTALLING_LOADING', package=package_name))
 
-        thread = threading.Thread(target=self.install_package, args=(package_name,))
-        thread.daemon = True
-        thread.start()
+        self.install_package(package_name)
 
     def on_uninstall_clicked(self, button):
         if not self.selected_package:
@@ -1075,9 +1912,7 @@ class MainWindow(Gtk.ApplicationWindow):
         self.uninstall_button.set_sensitive(False)
         self.status_label.set_text(_('STRING_UNINSTALLING_LOADING', package=package_name))
 
-        thread = threading.Thread(target=self.uninstall_package, args=(package_name,))
-        thread.daemon = True
-        thread.start()
+        self.uninstall_package(package_name)
 
     def on_aur_clicked(self, button):
         if not self.selected_package:
@@ -1091,6 +1926,90 @@ class MainWindow(Gtk.ApplicationWindow):
         except:
             self.status_label.set_text(STRINGS.get('STRING_BROWSER_ERROR', 'Fehler: Konnte Browser nicht öffnen'))
 
+    def on_dependencies_clicked(self, button):
+        if not self.selected_package:
+            return
+        
+        package_name = self.selected_package.split('/')[-1]
+        self.set_status(_('STRING_RESOLVING_DEPENDENCIES', package=package_name))
+        
+        def resolve():
+            try:
+                root = self.dependency_resolver.resolve(package_name)
+                GLib.idle_add(self.show_dependency_tree, root)
+            except Exception as e:
+                GLib.idle_add(self.set_status, f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
+        
+        threading.Thread(target=resolve, daemon=True).start()
+
+    def show_dependency_tree(self, root):
+        self.set_status(STRINGS.get('STRING_READY_STATUS', 'Bereit zur Suche'))
+        dialog = DependencyTreeDialog(self, root)
+        dialog.present()
+        return False
+
+    def on_pkgbuild_clicked(self, button):
+        if not self.selected_package:
+            return
+        
+        package_name = self.selected_package.split('/')[-1]
+        self.set_status(_('STRING_PKGBUILD_FETCHING', package=package_name))
+        
+        def fetch():
+            try:
+                package = self.lookup_aur_packages([package_name]).get(package_name)
+                if package is None:
+                    GLib.idle_add(self.set_status, _('STRING_PKGBUILD_NOT_AUR', package=package_name))
+                    return
+                pkgbase = package.get('package_base') or package_name
+                self.pkgbuild_mirror.fetch(pkgbase)
+                pkgbuild = self.pkgbuild_mirror.pkgbuild(pkgbase)
+                diff = self.pkgbuild_mirror.diff_installed(pkgbase)
+                GLib.idle_add(self.show_pkgbuild, pkgbase, pkgbuild, diff)
+            except Exception as e:
+                GLib.idle_add(self.set_status, f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
+        
+        threading.Thread(target=fetch, daemon=True).start()
+
+    def show_pkgbuild(self, pkgbase, pkgbuild, diff):
+        self.set_status(STRINGS.get('STRING_READY_STATUS', 'Bereit zur Suche'))
+        dialog = PKGBUILDDialog(self, pkgbase, pkgbuild, diff)
+        dialog.present()
+        return False
+
+    def record_installed_pkgbuild(self, package_name):
+        """Pin the AUR revision just installed as the base of later PKGBUILD diffs"""
+        record = self.local_db.get(package_name)
+        if record is None or self.sync_db.get(package_name) is not None:
+            return
+        pkgbase = record.get('package_base') or package_name
+        
+        def mark():
+            try:
+                self.pkgbuild_mirror.mark_installed(pkgbase)
+            except Exception as e:
+                print(f"Error recording installed PKGBUILD of {pkgbase}: {e}")
+        
+        threading.Thread(target=mark, daemon=True).start()
+
+    def lookup_aur_packages(self, names):
+        """AUR records for names, from the local index if it is loaded"""
+        if self.aur_index.loaded:
+            found = {name: self.aur_index.get(name) for name in names}
+            return {name: package for name, package in found.items() if package is not None}
+        return self.aur_client.info_batch(names)
+
+    def lookup_aur_providers(self, names):
+        """AUR records providing names, the most voted provider per name.
+
+        Only the local index can answer this in one go, the RPC would need a
+        request per name. Without it the names are left unresolved (None).
+        """
+        if not self.aur_index.loaded:
+            return None
+        found = {name: self.aur_index.providers(name) for name in names}
+        return {name: providers[0] for name, providers in found.items() if providers}
+
     def on_cleanup_clicked(self, button):
         """Clear yay cache and build artifacts"""
         def run_cleanup():
@@ -1169,108 +2088,185 @@ if [ $UPDATE_STATUS -eq 0 ]; then{success_msg}else{error_msg}fi
 
     def install_package(self, package_name):
         """Install package using yay in kgx terminal"""
-        def run_install():
-            try:
-                GLib.idle_add(self.set_status, _("STRING_INSTALLING", package=package_name))
-                
-                import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as f:
-                    script_path = f.name
-                    success_msg = get_terminal_notification(success=True, operation='install')
-                    error_msg = get_terminal_notification(success=False, operation='install')
-                    f.write(f'''#!/bin/bash
-yay -S {package_name}
-INSTALL_STATUS=$?
-
-if [ $INSTALL_STATUS -eq 0 ]; then{success_msg}else{error_msg}fi
-''')
-                
-                process = subprocess.Popen([
-                    'kgx', '--',
-                    'bash', script_path
-                ])
-                
-                process.wait()
-                
-                import os
-                try:
-                    os.unlink(script_path)
-                except:
-                    pass
-                
-                for attempt in range(120):
-                    time.sleep(1)
-                    if self.is_package_installed(package_name):
-                        GLib.idle_add(self.set_status, _("STRING_INSTALL_SUCCESS", package=package_name))
-                        GLib.idle_add(lambda: self.update_button_state(True))
-                        return
-                
-                installed = self.is_package_installed(package_name)
-                GLib.idle_add(lambda: self.update_button_state(installed))
-                if not installed:
-                    GLib.idle_add(self.set_status, STRINGS.get('STRING_INSTALL_ABORTED', '⚠ Installation abgebrochen oder fehlgeschlagen'))
-                    
-            except Exception as e:
-                GLib.idle_add(self.set_status, f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
-        
-        threading.Thread(target=run_install, daemon=True).start()
+        try:
+            self.set_status(_("STRING_INSTALLING", package=package_name))
+            self.run_in_terminal(f"yay -S {package_name}", 'install',
+                                 lambda status: self.on_install_finished(package_name, status))
+        except Exception as e:
+            self.set_status(f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
+            self.update_button_state(self.is_package_installed(package_name))
+
+    def on_install_finished(self, package_name, status):
+        # Read the new entries now instead of waiting for the file monitor
+        self.local_db.load()
+        self.details_cache.check(force=True)
+        installed = self.is_package_installed(package_name)
+        self.update_button_state(installed)
+        if status == 0 and installed:
+            self.set_status(_("STRING_INSTALL_SUCCESS", package=package_name))
+            self.record_installed_pkgbuild(package_name)
+        else:
+            self.set_status(STRINGS.get('STRING_INSTALL_ABORTED', '⚠ Installation abgebrochen oder fehlgeschlagen'))
 
     def uninstall_package(self, package_name):
         """Uninstall package using yay in kgx terminal"""
-        def run_uninstall():
-            try:
-                GLib.idle_add(self.set_status, _("STRING_UNINSTALLING", package=package_name))
-                
-                # Check if debug package exists and add it to removal list
-                packages_to_remove = [package_name]
-                debug_package = f"{package_name}-debug"
-                
-                if self.is_package_installed(debug_package):
-                    packages_to_remove.append(debug_package)
-                
-                remove_list = " ".join(packages_to_remove)
-                
-                import tempfile
-                import os
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as f:
-                    script_path = f.name
-                    success_msg = get_terminal_notification(success=True, operation='uninstall')
-                    error_msg = get_terminal_notification(success=False, operation='uninstall')
-                    f.write(f'''#!/bin/bash
-yay -Rns {remove_list}
-UNINSTALL_STATUS=$?
+        if not self.local_db_ready.is_set():
+            # The removal preview needs the installed packages, never skip it
+            self.set_status(_('STRING_WAITING_LOCAL_DB', package=package_name))
+            
+            def wait():
+                self.local_db_ready.wait()
+                GLib.idle_add(self.uninstall_package, package_name)
+            
+            threading.Thread(target=wait, daemon=True).start()
+            return
+        
+        try:
+            self.set_status(_("STRING_UNINSTALLING", package=package_name))
+            
+            # Check if debug package exists and add it to removal list
+            packages_to_remove = [package_name]
+            debug_package = f"{package_name}-debug"
+            
+            if self.is_package_installed(debug_package):
+                packages_to_remove.append(debug_package)
+            
+            # Packages that break, lose optional features or go with it
+            removed, broken, optional = self.reverse_dependencies.removal_impact(packages_to_remove)
+            if removed or broken or optional:
+                dialog = UninstallImpactDialog(self, package_name, removed, broken, optional)
+                dialog.connect("response", self.on_uninstall_impact_response, package_name, packages_to_remove)
+                dialog.present()
+                return
+            
+            self.run_uninstall(package_name, packages_to_remove)
+        except Exception as e:
+            self.set_status(f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
+            self.update_button_state(self.is_package_installed(package_name))
+
+    def on_uninstall_impact_response(self, dialog, response_id, package_name, packages_to_remove):
+        dialog.destroy()
+        if response_id == Gtk.ResponseType.OK:
+            self.run_uninstall(package_name, packages_to_remove)
+        else:
+            self.set_status(STRINGS.get('STRING_UNINSTALL_ABORTED', 'Deinstallation abgebrochen oder fehlgeschlagen'))
+            self.update_button_state(self.is_package_installed(package_name))
+
+    def run_uninstall(self, package_name, packages_to_remove):
+        remove_list = " ".join(packages_to_remove)
+        self.run_in_terminal(f"yay -Rns {remove_list}", 'uninstall',
+                             lambda status: self.on_uninstall_finished(package_name, status))
+
+    def on_uninstall_finished(self, package_name, status):
+        self.local_db.load()
+        self.details_cache.check(force=True)
+        installed = self.is_package_installed(package_name)
+        self.update_button_state(installed)
+        if status == 0 and not installed:
+            self.set_status(_("STRING_UNINSTALL_SUCCESS", package=package_name))
+        else:
+            self.set_status(STRINGS.get('STRING_UNINSTALL_ABORTED', 'Deinstallation abgebrochen oder fehlgeschlagen'))
+
+    def run_in_terminal(self, command, operation, on_finished):
+        """Run command in kgx and call on_finished(exit_status) once it is done.
 
-if [ $UNINSTALL_STATUS -eq 0 ]; then{success_msg}else{error_msg}fi
+        The wrapper script writes the exit status of command to a status file
+        from an EXIT trap, so closing the terminal early is reported too. The
+        work directory is watched because kgx may hand the command over to a
+        running instance and exit right away. The script also records its
+        pid, a script that never starts or dies without running its trap is
+        reported as failed, so the buttons always come back.
+        """
+        work_dir = tempfile.mkdtemp(prefix="gnome-aur-manager-")
+        script_path = os.path.join(work_dir, "run.sh")
+        status_path = os.path.join(work_dir, "status")
+        pid_path = os.path.join(work_dir, "pid")
+        success_msg = get_terminal_notification(success=True, operation=operation)
+        error_msg = get_terminal_notification(success=False, operation=operation)
+        with open(script_path, 'w') as f:
+            f.write(f'''#!/bin/bash
+trap 'echo "${{COMMAND_STATUS:-129}}" > "{status_path}.part"; mv "{status_path}.part" "{status_path}"' EXIT
+trap 'exit' HUP
+echo $$ > "{pid_path}"
+{command}
+COMMAND_STATUS=$?
+
+if [ $COMMAND_STATUS -eq 0 ]; then{success_msg}else{error_msg}fi
 ''')
-                
-                process = subprocess.Popen([
-                    'kgx', '--',
-                    'bash', script_path
-                ])
-                
-                process.wait()
-                
-                try:
-                    os.unlink(script_path)
-                except:
-                    pass
-                
-                for attempt in range(120):
-                    time.sleep(1)
-                    if not self.is_package_installed(package_name):
-                        GLib.idle_add(self.set_status, _("STRING_UNINSTALL_SUCCESS", package=package_name))
-                        GLib.idle_add(lambda: self.update_button_state(False))
-                        return
-                
-                installed = self.is_package_installed(package_name)
-                GLib.idle_add(lambda: self.update_button_state(installed))
-                if installed:
-                    GLib.idle_add(self.set_status, STRINGS.get('STRING_UNINSTALL_ABORTED', 'Deinstallation abgebrochen oder fehlgeschlagen'))
-                    
-            except Exception as e:
-                GLib.idle_add(self.set_status, f"{STRINGS.get('STRING_ERROR_PREFIX', 'Fehler:')} {str(e)}")
         
-        threading.Thread(target=run_uninstall, daemon=True).start()
+        monitor = Gio.File.new_for_path(work_dir).monitor_directory(Gio.FileMonitorFlags.NONE, None)
+        finished = False
+        script_started = False
+        start_timeout_id = 0
+        
+        def finish(status):
+            nonlocal finished
+            if finished:
+                return False
+            finished = True
+            monitor.cancel()
+            self.terminal_monitors.discard(monitor)
+            if start_timeout_id:
+                GLib.source_remove(start_timeout_id)
+            shutil.rmtree(work_dir, ignore_errors=True)
+            on_finished(status)
+            return False
+        
+        def on_script_exited():
+            # Killed before its EXIT trap ran, unless the trap just finished
+            status = read_script_value(status_path)
+            return finish(TERMINAL_LOST_STATUS if status is None else status)
+        
+        def wait_for_script(pid):
+            wait_for_exit(pid)
+            GLib.idle_add(on_script_exited)
+        
+        def on_work_dir_changed(monitor, file, other_file, event_type):
+            nonlocal script_started, start_timeout_id
+            status = read_script_value(status_path)
+            if status is not None:
+                finish(status)
+                return
+            pid = read_script_value(pid_path)
+            if pid is not None and not script_started:
+                script_started = True
+                if start_timeout_id:
+                    GLib.source_remove(start_timeout_id)
+                    start_timeout_id = 0
+                threading.Thread(target=wait_for_script, args=(pid,), daemon=True).start()
+        
+        def on_start_timeout():
+            nonlocal start_timeout_id
+            start_timeout_id = 0
+            if not script_started:
+                # Handed over to a terminal that never started the script
+                finish(TERMINAL_LOST_STATUS)
+            return False
+        
+        def on_terminal_exited(returncode):
+            if returncode != 0 and not script_started and read_script_value(pid_path) is None:
+                # kgx itself failed, the script never ran
+                finish(returncode)
+            return False
+        
+        monitor.connect("changed", on_work_dir_changed)
+        self.terminal_monitors.add(monitor)
+        
+        try:
+            process = subprocess.Popen(['kgx', '--', 'bash', script_path])
+        except OSError:
+            finished = True
+            monitor.cancel()
+            self.terminal_monitors.discard(monitor)
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+        
+        start_timeout_id = GLib.timeout_add_seconds(TERMINAL_START_TIMEOUT, on_start_timeout)
+        
+        def wait_for_terminal():
+            GLib.idle_add(on_terminal_exited, process.wait())
+        
+        threading.Thread(target=wait_for_terminal, daemon=True).start()
 
     def set_status(self, text):
         self.status_label.set_text(text)
@@ -0,0 +1,112 @@
+"""Parser for the text output of yay -Ss.
+
+yay prints every package as a header line followed by an indented
+description line:
+
+    aur/python-foo 1.2.3-1 (+12 0.34) (Installed)
+        Description text
+
+Headers of indented (repository style) entries only count when their
+second token looks like a version.
+"""
+import re
+
+
+# Whitespace that does not cross a line break
+_WS = r'[^\S\n]'
+
+_AUR_HEADER = rf'aur/(?P<aur_name>\S*){_WS}+(?P<aur_version>\S+)[^\n]*'
+_AUR_DESCRIPTION = r'(?:\n {4}(?P<aur_description>[^\n]*))?'
+
+_REPO_HEADER = (rf' {{4}}{_WS}*(?P<repo_name>[^\s(]\S*){_WS}+'
+                r'(?P<repo_version>\S*\d\S*|r\S*)(?=\s|$)[^\n]*')
+# A repository description must not itself look like the next package
+_REPO_DESCRIPTION = (rf'(?:\n(?! {{4}}{_WS}*\S+{_WS}+\S*\d) {{4}}'
+                     rf'(?P<repo_description>{_WS}*\S[^\n]*))?')
+
+_RECORD_RE = re.compile(
+    rf'^(?:{_AUR_HEADER}{_AUR_DESCRIPTION}|{_REPO_HEADER}{_REPO_DESCRIPTION})',
+    re.MULTILINE
+)
+
+# Single-line patterns for the streaming parser
+_AUR_LINE_RE = re.compile(rf'aur/(\S*){_WS}+(\S+)')
+_REPO_LINE_RE = re.compile(rf' {{4}}{_WS}*([^\s(]\S*){_WS}+(\S*\d\S*|r\S*)(?=\s|$)')
+_NEXT_PACKAGE_RE = re.compile(rf' {{4}}{_WS}*\S+{_WS}+\S*\d')
+_DESCRIPTION_RE = re.compile(rf' {{4}}{_WS}*\S')
+
+_groups = re.Match.groups
+
+
+def iter_yay_output(output):
+    """Yield package dicts from the complete output in a single regex pass."""
+    if output[:1].isspace():
+        output = output.lstrip()
+
+    for (aur_name, aur_version, aur_description,
+         repo_name, repo_version, repo_description) in map(_groups, _RECORD_RE.finditer(output)):
+        if aur_name is not None:
+            yield {
+                'name': aur_name.replace("aur/", ""),
+                'version': aur_version,
+                'description': aur_description.strip() if aur_description else ""
+            }
+        else:
+            yield {
+                'name': repo_name,
+                'version': repo_version,
+                'description': repo_description.strip() if repo_description else ""
+            }
+
+
+def iter_yay_packages(lines):
+    """Yield package dicts from yay -Ss output lines as they arrive.
+
+    Streaming counterpart of iter_yay_output: a package line is held back
+    until the next line shows whether it carries a description, so this
+    works directly on a process' stdout.
+    """
+    pending = None
+    pending_is_aur = False
+
+    for line in lines:
+        if pending is not None:
+            pkg = pending
+            pending = None
+            if line.startswith("    "):
+                if pending_is_aur:
+                    pkg['description'] = line.strip()
+                    yield pkg
+                    continue
+                if _DESCRIPTION_RE.match(line) and not _NEXT_PACKAGE_RE.match(line):
+                    pkg['description'] = line.strip()
+                    yield pkg
+                    continue
+            yield pkg
+
+        match = _AUR_LINE_RE.match(line)
+        if match:
+            pending = {
+                'name': match.group(1).replace("aur/", ""),
+                'version': match.group(2),
+                'description': ""
+            }
+            pending_is_aur = True
+            continue
+
+        match = _REPO_LINE_RE.match(line)
+        if match:
+            pending = {
+                'name': match.group(1),
+                'version': match.group(2),
+                'description': ""
+            }
+            pending_is_aur = False
+
+    if pending is not None:
+        yield pending
+
+
+def parse_yay_output(output):
+    """Parse the complete output of yay -Ss into a list of package dicts."""
+    return list(iter_yay_output(output))
@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+class FakeLocalDatabase:
+    """Stand-in for pacman_db.LocalDatabase, packages maps names to records."""
+
+    def __init__(self):
+        self.packages = {}
+
+    def set_packages(self, packages):
+        # Like LocalDatabase.load, a change replaces the packages dict
+        self.packages = {pkg['name']: pkg for pkg in packages}
+
+    def get(self, name):
+        return self.packages.get(name)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers), self.client_address[1]))
+        status, headers, body = self.server.respond(self.path, self.headers)
+        self.send_response(status)
+        headers = dict(headers)
+        headers.setdefault('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        if headers.get('Connection') == 'close':
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local HTTP server, respond(path, headers) returns (status, headers, body).
+
+    requests records (path, headers, client port) of every request served.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.requests = []
+        self.respond = lambda path, headers: (404, {}, b'')
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture
+def local_db():
+    return FakeLocalDatabase()
+
+
+@pytest.fixture
+def http_server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
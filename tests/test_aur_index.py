@@ -0,0 +1,143 @@
+import gzip
+import json
+import os
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from aur_index import INDEX_FILE, AURIndex
+
+
+DUMP = [
+    {'Name': 'yay', 'PackageBase': 'yay', 'Version': '12.3.5-1',
+     'Description': 'Yet another yogurt. Pacman wrapper and AUR helper written in go.',
+     'NumVotes': 2300, 'Popularity': 30.5, 'Maintainer': 'jguer',
+     'Depends': ['pacman>6.1', 'git'], 'MakeDepends': ['go>=1.21']},
+    {'Name': 'yay-bin', 'PackageBase': 'yay-bin', 'Version': '12.3.5-1',
+     'Description': 'Yet another yogurt. Pacman wrapper and AUR helper written in go. Pre-compiled.',
+     'NumVotes': 400, 'Popularity': 5.1, 'Maintainer': 'jguer', 'Provides': ['yay']},
+    {'Name': 'paru', 'PackageBase': 'paru', 'Version': '2.0.4-1',
+     'Description': 'Feature packed AUR helper',
+     'NumVotes': 900, 'Popularity': 20.0, 'Maintainer': 'Morganamilo'},
+    {'Name': 'old-tool', 'PackageBase': 'old-tool', 'Version': '0.1-1',
+     'Description': 'An abandoned helper', 'NumVotes': 1, 'Popularity': 0.0,
+     'Maintainer': None, 'OutOfDate': 1600000000},
+]
+
+
+def write_dump(path, entries=DUMP):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(entries, f)
+    return str(path)
+
+
+def part_files(index):
+    return [name for name in os.listdir(index.cache_dir) if name.endswith('.part')]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = AURIndex(cache_dir=str(tmp_path / 'cache'))
+    index.refresh(write_dump(tmp_path / 'dump.json.gz'))
+    return index
+
+
+def test_refresh_from_local_dump(index, tmp_path):
+    assert index.loaded
+    assert len(index.packages) == len(DUMP)
+    assert os.path.exists(tmp_path / 'cache' / INDEX_FILE)
+    assert index.get('paru')['version'] == '2.0.4-1'
+    assert index.get('yay-bin')['provides'] == ['yay']
+
+
+def test_load_reads_cached_dump(index, tmp_path):
+    reloaded = AURIndex(cache_dir=str(tmp_path / 'cache'))
+    assert reloaded.exists()
+    assert reloaded.load() == len(DUMP)
+    assert reloaded.get('yay')['maintainer'] == 'jguer'
+
+
+def test_search_matches_every_term(index):
+    assert [pkg['name'] for pkg in index.search('yogurt go')] == ['yay', 'yay-bin']
+    assert [pkg['name'] for pkg in index.search('aur helper')] == ['yay', 'yay-bin', 'paru']
+    assert index.search('yogurt pre-compiled', limit=1)[0]['name'] == 'yay-bin'
+    assert index.search('') == []
+
+
+def test_search_with_filters(index):
+    assert {pkg['name'] for pkg in index.search('helper votes:>500')} == {'yay', 'paru'}
+    assert [pkg['name'] for pkg in index.search('maintainer:none')] == ['old-tool']
+    assert [pkg['name'] for pkg in index.search('outofdate:yes')] == ['old-tool']
+
+
+def test_refresh_downloads_and_sends_if_modified_since(http_server, tmp_path):
+    with open(write_dump(tmp_path / 'dump.json.gz'), 'rb') as f:
+        body = f.read()
+    http_server.respond = lambda path, headers: (200, {}, body)
+    index = AURIndex(cache_dir=str(tmp_path / 'cache'), url=http_server.url + '/dump.json.gz')
+
+    assert index.refresh() == len(DUMP)
+    assert 'If-Modified-Since' not in http_server.requests[-1][1]
+
+    http_server.respond = lambda path, headers: (304, {}, b'')
+    assert index.refresh() == len(DUMP)
+    assert 'If-Modified-Since' in http_server.requests[-1][1]
+    assert index.age() < 60
+
+
+def test_failed_download_keeps_previous_dump(http_server, tmp_path):
+    index = AURIndex(cache_dir=str(tmp_path / 'cache'), url=http_server.url + '/dump.json.gz')
+    index.refresh(write_dump(tmp_path / 'dump.json.gz'))
+
+    http_server.respond = lambda path, headers: (500, {}, b'')
+    with pytest.raises(urllib.error.HTTPError):
+        index.refresh()
+    assert part_files(index) == []
+    assert index.load() == len(DUMP)
+
+
+def test_truncated_download_removes_part_file(http_server, tmp_path):
+    index = AURIndex(cache_dir=str(tmp_path / 'cache'), url=http_server.url + '/dump.json.gz')
+    http_server.respond = lambda path, headers: (
+        200, {'Content-Length': '4096', 'Connection': 'close'}, b'\x1f\x8b partial')
+    with pytest.raises(Exception):
+        index.refresh()
+    assert part_files(index) == []
+    assert not index.exists()
+
+
+def test_providers_most_voted_first(index, tmp_path):
+    dump = DUMP + [{'Name': 'yay-git', 'PackageBase': 'yay-git', 'Version': '12.3.5.r1-1',
+                    'Description': 'Yet another yogurt, development version.',
+                    'NumVotes': 90, 'Popularity': 1.0, 'Provides': ['yay=12.3.5']}]
+    index.refresh(write_dump(tmp_path / 'dump.json.gz', dump))
+    assert [pkg['name'] for pkg in index.providers('yay')] == ['yay-bin', 'yay-git']
+    assert index.providers('paru') == []
+
+
+def test_concurrent_refreshes_do_not_overlap(http_server, tmp_path):
+    with open(write_dump(tmp_path / 'dump.json.gz'), 'rb') as f:
+        body = f.read()
+    active = []
+    overlapped = []
+
+    def respond(path, headers):
+        active.append(path)
+        overlapped.append(len(active) > 1)
+        time.sleep(0.1)
+        active.pop()
+        return 200, {}, body
+
+    http_server.respond = respond
+    index = AURIndex(cache_dir=str(tmp_path / 'cache'), url=http_server.url + '/dump.json.gz')
+    threads = [threading.Thread(target=index.refresh) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert overlapped == [False, False, False]
+    assert part_files(index) == []
+    assert AURIndex(cache_dir=str(tmp_path / 'cache')).load() == len(DUMP)
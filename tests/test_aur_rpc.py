@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from aur_rpc import AURClient, AURRpcError
+
+
+PACKAGES = {
+    'yay': {'Name': 'yay', 'PackageBase': 'yay', 'Version': '12.3.5-1',
+            'Description': 'Yet another yogurt. Pacman wrapper and AUR helper written in go.'},
+    'yay-bin': {'Name': 'yay-bin', 'PackageBase': 'yay-bin', 'Version': '12.3.5-1',
+                'Description': 'Yet another yogurt, pre-compiled.'},
+    'paru': {'Name': 'paru', 'PackageBase': 'paru', 'Version': '2.0.4-1',
+             'Description': 'Feature packed AUR helper'},
+}
+
+
+def rpc_response(results):
+    body = json.dumps({'version': 5, 'type': 'multiinfo', 'resultcount': len(results),
+                       'results': results}).encode()
+    return 200, {'Content-Type': 'application/json'}, body
+
+
+def aur_stand_in(path, headers):
+    parts = urllib.parse.urlsplit(path)
+    if parts.path.startswith('/rpc/v5/search/'):
+        keyword = urllib.parse.unquote(parts.path[len('/rpc/v5/search/'):])
+        return rpc_response([entry for entry in PACKAGES.values()
+                             if keyword in f"{entry['Name']} {entry['Description']}".lower()])
+    if parts.path == '/rpc/v5/info':
+        names = urllib.parse.parse_qs(parts.query).get('arg[]', [])
+        return rpc_response([PACKAGES[name] for name in names if name in PACKAGES])
+    return 404, {}, b''
+
+
+def client_for(server, **kwargs):
+    kwargs.setdefault('min_interval', 0)
+    kwargs.setdefault('backoff', 0.01)
+    return AURClient(base_url=server.url, **kwargs)
+
+
+def test_search_filters_every_term(http_server):
+    http_server.respond = aur_stand_in
+    client = client_for(http_server)
+    assert {pkg['name'] for pkg in client.search('yogurt')} == {'yay', 'yay-bin'}
+    # Only the longest term goes to the server, the rest is filtered locally
+    assert [pkg['name'] for pkg in client.search('yogurt go')] == ['yay']
+    assert http_server.requests[-1][0] == '/rpc/v5/search/yogurt?by=name-desc'
+    assert client.search('  ') == []
+
+
+def test_info_batch_reuses_one_connection(http_server):
+    http_server.respond = aur_stand_in
+    client = client_for(http_server)
+    records = client.info_batch(['yay', 'aur/paru', 'missing'])
+    assert set(records) == {'yay', 'paru'}
+    assert records['paru']['repository'] == 'aur'
+    client.info_batch(['yay-bin'])
+    client.search('helper')
+    assert len({port for _path, _headers, port in http_server.requests}) == 1
+    client.close()
+
+
+def test_info_batch_splits_long_requests(http_server):
+    http_server.respond = aur_stand_in
+    client = client_for(http_server)
+    names = [f"package-with-a-long-name-{i}" for i in range(400)] + ['yay']
+    assert set(client.info_batch(names)) == {'yay'}
+    assert len(http_server.requests) > 1
+    assert all(len(path) <= 4000 for path, _headers, _port in http_server.requests)
+
+
+def test_backoff_retries_rate_limited_and_failed_requests(http_server):
+    responses = [(429, {'Retry-After': '0'}, b''), (503, {}, b''), None]
+
+    def respond(path, headers):
+        response = responses.pop(0)
+        return response or aur_stand_in(path, headers)
+
+    http_server.respond = respond
+    client = client_for(http_server, backoff=0.05)
+    start = time.monotonic()
+    assert set(client.info_batch(['yay'])) == {'yay'}
+    assert len(http_server.requests) == 3
+    # Retry-After 0 for the 429, then the initial backoff doubled for the 503
+    assert time.monotonic() - start >= 0.1
+
+
+def test_gives_up_after_max_retries(http_server):
+    http_server.respond = lambda path, headers: (500, {}, b'')
+    client = client_for(http_server, max_retries=2)
+    with pytest.raises(AURRpcError):
+        client.info(['yay'])
+    assert len(http_server.requests) == 3
+
+
+def test_client_errors_are_not_retried(http_server):
+    http_server.respond = lambda path, headers: (404, {}, b'')
+    client = client_for(http_server)
+    with pytest.raises(AURRpcError):
+        client.info(['yay'])
+    assert len(http_server.requests) == 1
+
+
+def test_error_response_raises(http_server):
+    body = json.dumps({'type': 'error', 'error': 'Too many package results.'}).encode()
+    http_server.respond = lambda path, headers: (200, {}, body)
+    with pytest.raises(AURRpcError, match='Too many'):
+        client_for(http_server).search('a')
+
+
+def test_rate_limit_spaces_requests(http_server):
+    http_server.respond = aur_stand_in
+    client = client_for(http_server, min_interval=0.05)
+    start = time.monotonic()
+    for name in ('yay', 'paru', 'yay-bin'):
+        client.info([name])
+    assert time.monotonic() - start >= 0.1
+
+
+def test_identical_requests_in_flight_are_coalesced(http_server):
+    release = threading.Event()
+
+    def respond(path, headers):
+        release.wait(5)
+        return aur_stand_in(path, headers)
+
+    http_server.respond = respond
+    client = client_for(http_server)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.info(['yay'])))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 4
+    assert all(result[0]['name'] == 'yay' for result in results)
+    assert len(http_server.requests) == 1
+
+
+def test_search_retries_can_be_disabled(http_server):
+    http_server.respond = lambda path, headers: (503, {}, b'')
+    client = client_for(http_server, max_retries=3)
+    with pytest.raises(AURRpcError):
+        client.search('yay', max_retries=0)
+    assert len(http_server.requests) == 1
+
+
+@pytest.mark.parametrize('body', [b'<html><body>Bad Gateway</body></html>', b'{"results": [{"Na',
+                                  b'["not", "an", "object"]'])
+def test_invalid_json_raises_rpc_error(http_server, body):
+    http_server.respond = lambda path, headers: (200, {'Content-Type': 'text/html'}, body)
+    client = client_for(http_server)
+    with pytest.raises(AURRpcError):
+        client.info(['yay'])
+    with pytest.raises(AURRpcError):
+        client.info_batch(['yay'])
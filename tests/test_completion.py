@@ -0,0 +1,17 @@
+from completion import NameCompleter
+
+
+def test_complete_prefers_repository_names_and_popularity():
+    completer = NameCompleter()
+    completer.build(
+        [{'name': 'python', 'repository': 'core'}, {'name': 'python-pip', 'repository': 'extra'}],
+        [{'name': 'python-aur-tool', 'repository': 'aur', 'popularity': 0.1},
+         {'name': 'python-popular', 'repository': 'aur', 'popularity': 40.0},
+         {'name': 'rust-tool', 'repository': 'aur', 'popularity': 5.0}])
+    names = completer.complete('pyth', limit=3)
+    assert names[:2] == ['python', 'python-pip']
+    assert names[2] == 'python-popular'
+    assert completer.complete('rust') == ['rust-tool']
+    assert completer.complete('zzz') == []
+    assert len(completer) == 5
+    assert completer.memory_usage() > 0
@@ -0,0 +1,123 @@
+from depgraph import AUR, INSTALLED, MISSING, REPO, UNRESOLVED, DependencyResolver, dependency_name
+
+
+class FakeSyncDatabase:
+    def __init__(self, packages):
+        self.packages = list(packages)
+
+    def get(self, name):
+        return next((pkg for pkg in self.packages if pkg['name'] == name), None)
+
+
+def package(name, depends=(), makedepends=(), provides=()):
+    return {'name': name, 'depends': list(depends), 'makedepends': list(makedepends),
+            'provides': list(provides)}
+
+
+AUR_PACKAGES = {pkg['name']: pkg for pkg in (
+    package('app', depends=['libfoo>=2', 'glibc', 'sh'], makedepends=['cmake', 'foo']),
+    package('libfoo', depends=['glibc']),
+    package('foo-git', depends=['libfoo'], provides=['foo=1.2']),
+)}
+
+
+def make_resolver(local_db, local=(), sync=(), providers=True, fail=()):
+    calls = []
+
+    def aur_lookup(names):
+        calls.append(names)
+        if set(names) & set(fail):
+            raise OSError('AUR unreachable')
+        return {name: AUR_PACKAGES[name] for name in names if name in AUR_PACKAGES}
+
+    def aur_providers(names):
+        if providers is None:
+            # No index, providers cannot be told
+            return None
+        return {name: pkg for name in names for pkg in AUR_PACKAGES.values()
+                if name in map(dependency_name, pkg['provides'])}
+
+    local_db.set_packages(local)
+    sync_db = FakeSyncDatabase(sync)
+    resolver = DependencyResolver(local_db, sync_db, aur_lookup,
+                                  aur_providers if providers is not False else None)
+    return resolver, calls
+
+
+def kinds(nodes):
+    return {node.name: node.kind for node in nodes}
+
+
+def test_dependency_name():
+    assert dependency_name('python>=3.10') == 'python'
+    assert dependency_name('foo=1.2') == 'foo'
+    assert dependency_name('glibc') == 'glibc'
+
+
+def test_resolve_classifies_dependencies(local_db):
+    resolver, calls = make_resolver(
+        local_db, local=[package('glibc'), package('bash', provides=['sh'])],
+        sync=[package('cmake')])
+    root = resolver.resolve('app')
+    assert root.kind == AUR
+    assert kinds(root.depends) == {'libfoo': AUR, 'glibc': INSTALLED, 'sh': INSTALLED}
+    assert kinds(root.makedepends) == {'cmake': REPO, 'foo': AUR}
+    assert next(node for node in root.depends if node.name == 'sh').satisfied_by == 'bash'
+    # One lookup for the root and one for the first level, libfoo is shared
+    assert calls == [['app'], ['foo', 'libfoo']]
+
+
+def test_aur_provides_satisfy_dependencies(local_db):
+    resolver, _calls = make_resolver(local_db, local=[package('glibc'), package('sh')])
+    root = resolver.resolve('app')
+    foo = next(node for node in root.makedepends if node.name == 'foo')
+    assert foo.kind == AUR
+    assert foo.satisfied_by == 'foo-git'
+    assert kinds(foo.depends) == {'libfoo': AUR}
+
+
+def test_unprovided_names_are_missing(local_db):
+    resolver, _calls = make_resolver(local_db, local=[package('glibc')], providers=False)
+    root = resolver.resolve('app')
+    assert kinds(root.depends)['sh'] == MISSING
+    assert kinds(root.makedepends) == {'cmake': MISSING, 'foo': MISSING}
+
+
+def test_nodes_are_reused_until_the_databases_change(local_db):
+    resolver, calls = make_resolver(local_db, local=[package('glibc'), package('sh')],
+                                    sync=[package('cmake')])
+    resolver.resolve('app')
+    resolver.resolve('app')
+    assert len(calls) == 2
+
+    local_db.set_packages([*local_db.packages.values(), package('cmake')])
+    root = resolver.resolve('app')
+    assert kinds(root.makedepends)['cmake'] == INSTALLED
+    assert len(calls) == 4
+
+
+def test_names_without_provides_data_are_unresolved(local_db):
+    resolver, _calls = make_resolver(local_db, local=[package('glibc'), package('sh')],
+                                     providers=None)
+    root = resolver.resolve('app')
+    assert kinds(root.makedepends) == {'cmake': UNRESOLVED, 'foo': UNRESOLVED}
+    assert kinds(root.depends)['libfoo'] == AUR
+
+
+def test_failed_lookup_leaves_nodes_unresolved_and_is_retried(local_db):
+    resolver, calls = make_resolver(local_db, local=[package('glibc'), package('sh')],
+                                    sync=[package('cmake')], fail=['libfoo'])
+    root = resolver.resolve('app')
+    assert kinds(root.depends)['libfoo'] == UNRESOLVED
+    assert kinds(root.makedepends)['foo'] == UNRESOLVED
+    assert kinds(root.makedepends)['cmake'] == REPO
+
+    # Unresolved graphs are not reused, the next resolve asks again
+    calls.clear()
+    resolver.resolve('app')
+    assert calls
+
+
+def test_failed_root_lookup_is_unresolved(local_db):
+    resolver, _calls = make_resolver(local_db, fail=['app'])
+    assert resolver.resolve('app').kind == UNRESOLVED
@@ -0,0 +1,71 @@
+import threading
+
+from details_cache import DetailsCache, estimate_size
+
+
+def installed(**versions):
+    return [{'name': name, 'version': version} for name, version in versions.items()]
+
+
+def make_cache(tmp_path, local_db, **kwargs):
+    sync_dir = tmp_path / 'sync'
+    sync_dir.mkdir(exist_ok=True)
+    return DetailsCache(local_db, sync_dir=str(sync_dir), check_interval=0, **kwargs)
+
+
+def details(name, repository):
+    return ({'name': name, 'repository': repository, 'description': 'x' * 100}, False)
+
+
+def test_local_changes_drop_only_changed_packages(tmp_path, local_db):
+    local_db.set_packages(installed(bash='5.2-1', yay='12.0-1'))
+    cache = make_cache(tmp_path, local_db)
+    for name, repository in (('bash', 'core'), ('yay', 'aur'), ('paru', 'aur')):
+        cache.put(name, details(name, repository), repository)
+
+    local_db.set_packages(installed(bash='5.2-1', yay='12.1-1', paru='2.0-1'))
+    assert cache.get('bash') is not None
+    assert cache.get('yay') is None
+    assert cache.get('paru') is None
+
+
+def test_sync_change_drops_repository_and_aur_entries(tmp_path, local_db):
+    cache = make_cache(tmp_path, local_db)
+    for name, repository in (('bash', 'core'), ('python', 'extra'), ('yay', 'aur')):
+        cache.put(name, details(name, repository), repository)
+
+    (tmp_path / 'sync' / 'core.db').write_bytes(b'')
+    assert cache.get('python') is not None
+    assert cache.get('bash') is None
+    assert cache.get('yay') is None
+
+
+def test_lru_stays_within_budget(tmp_path, local_db):
+    entry_size = estimate_size(details('p0', 'aur'))
+    cache = make_cache(tmp_path, local_db, max_bytes=entry_size * 3 + 10)
+    for i in range(5):
+        cache.put(f"p{i}", details(f"p{i}", 'aur'), 'aur')
+        if i == 2:
+            cache.get('p0')
+    assert cache.size <= cache.max_bytes
+    assert cache.get('p0') is not None
+    assert cache.get('p1') is None
+
+
+def test_concurrent_checks(tmp_path, local_db):
+    local_db.set_packages(installed(bash='1'))
+    cache = make_cache(tmp_path, local_db)
+    cache.put('bash', details('bash', 'core'), 'core')
+
+    def churn(i):
+        for j in range(200):
+            local_db.set_packages(installed(bash=str(j % 3)))
+            cache.put(f"p{i}-{j}", details('x', 'aur'), 'aur')
+            cache.check(force=True)
+
+    threads = [threading.Thread(target=churn, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.size == sum(entry[2] for entry in cache._entries.values())
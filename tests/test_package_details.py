@@ -0,0 +1,131 @@
+import calendar
+import os
+import time
+
+import pytest
+
+from package_details import c_locale_env, details_record, empty_record, format_value, parse_si_output
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'yay_si')
+LOCALES = {
+    'de': 'de_DE.UTF-8',
+    'en': 'en_US.UTF-8',
+    'es': 'es_ES.UTF-8',
+    'fr': 'fr_FR.UTF-8',
+    'it': 'it_IT.UTF-8',
+}
+
+YAY = {
+    'name': 'yay',
+    'version': '12.3.5-1',
+    'description': 'Yet another yogurt. Pacman wrapper and AUR helper written in go.',
+    'repository': 'aur',
+    'url': 'https://github.com/Jguer/yay',
+    'licenses': ['GPL-3.0-or-later'],
+    'groups': [],
+    'keywords': ['arm', 'aur', 'go', 'helper', 'pacman', 'wrapper', 'x86'],
+    'provides': [],
+    'depends': ['pacman>6.1', 'git'],
+    'makedepends': ['go>=1.21'],
+    'optdepends': ['sudo', 'doas'],
+    'maintainer': 'jguer',
+    'votes': 2343,
+    'popularity': 20.04,
+    'last_modified': calendar.timegm((2024, 3, 17, 15, 36, 42)),
+    'out_of_date': None,
+}
+GIT = {
+    'name': 'git',
+    'version': '2.45.0-1',
+    'description': 'the fast distributed version control system',
+    'repository': 'extra',
+    'url': 'https://git-scm.com/',
+    'licenses': ['GPL-2.0-only'],
+    'groups': [],
+    'keywords': [],
+    'provides': [],
+    'depends': ['curl', 'expat', 'grep', 'openssl>=1.1.0', 'pcre2', 'perl-error',
+                'perl>=5.14.0', 'shadow', 'zlib'],
+    'makedepends': [],
+    'optdepends': ['tk: gitk and git gui', 'openssh: ssh transport and crypto',
+                   'perl-libwww: git svn'],
+    'maintainer': None,
+    'votes': None,
+    'popularity': None,
+    'last_modified': None,
+    'out_of_date': None,
+}
+
+
+@pytest.fixture
+def utc():
+    """The fixtures were captured with TZ=UTC"""
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = 'UTC'
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = previous
+    time.tzset()
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('locale', sorted(LOCALES))
+def test_c_locale_env_overrides_user_locale(locale):
+    user_env = {'PATH': '/usr/bin', 'LANG': LOCALES[locale], 'LC_MESSAGES': LOCALES[locale],
+                'LC_TIME': LOCALES[locale], 'LANGUAGE': f"{locale}:en"}
+    env = c_locale_env(user_env)
+    assert env['LANG'] == env['LC_ALL'] == env['LANGUAGE'] == 'C'
+    assert env['PATH'] == '/usr/bin'
+    assert user_env['LANG'] == LOCALES[locale]
+
+
+@pytest.mark.parametrize('name, expected', [('yay.txt', YAY), ('git.txt', GIT)])
+def test_parse_si_output(utc, name, expected):
+    assert parse_si_output(read_fixture(name)) == expected
+
+
+def test_parse_si_output_reads_only_the_first_package(utc):
+    output = read_fixture('yay.txt') + read_fixture('git.txt')
+    assert parse_si_output(output) == YAY
+
+
+@pytest.mark.parametrize('output', [
+    # German keeps Name and Version, but not Description
+    "Repository      : aur\nName            : yay\nVersion         : 12.3.5-1\n"
+    "Beschreibung    : Yet another yogurt.\nHängt ab von    : pacman>6.1  git\n",
+    "Dépôt           : aur\nNom             : yay\nVersion         : 12.3.5-1\n"
+    "Description     : Yet another yogurt.\n",
+    "Repositorio     : aur\nNombre          : yay\nVersión         : 12.3.5-1\n"
+    "Descripción     : Yet another yogurt.\n",
+])
+def test_parse_si_output_rejects_translated_labels(output):
+    with pytest.raises(ValueError, match='not in the C locale'):
+        parse_si_output(output)
+
+
+def test_parse_si_output_without_output():
+    assert parse_si_output('') == empty_record()
+
+
+def test_details_record_matches_parsed_record(utc):
+    aur_package = dict(YAY, id=1344812, package_base='yay')
+    assert details_record(aur_package) == YAY
+    # Lists are copies, the index entry is not shared with the UI
+    assert details_record(aur_package)['depends'] is not aur_package['depends']
+
+
+def test_format_value():
+    assert format_value('depends', ['git', 'go']) == 'git  go'
+    assert format_value('optdepends', GIT['optdepends']).count('\n') == 2
+    assert format_value('popularity', 20.04) == '20.04'
+    assert format_value('votes', 0) == '0'
+    assert format_value('groups', []) == ''
+    assert format_value('maintainer', None) == ''
@@ -0,0 +1,172 @@
+import io
+import os
+import tarfile
+
+import pytest
+
+from pacman_db import LocalDatabase, SyncDatabase, parse_desc, read_sync_db
+
+
+def desc_text(name, version, description='', **lists):
+    lines = [f"%NAME%\n{name}\n", f"%VERSION%\n{version}\n", f"%DESC%\n{description}\n"]
+    for field, values in lists.items():
+        lines.append(f"%{field.upper()}%\n" + "".join(f"{value}\n" for value in values))
+    return "\n".join(lines)
+
+
+def write_sync_db(path, packages, compression='gz'):
+    """Write a sync .db archive with one name-version/desc entry per package."""
+    with tarfile.open(path, f"w:{compression}") as archive:
+        for name, version, description, lists in packages:
+            data = desc_text(name, version, description, **lists).encode()
+            info = tarfile.TarInfo(f"{name}-{version}/desc")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+            directory = tarfile.TarInfo(f"{name}-{version}")
+            directory.type = tarfile.DIRTYPE
+            archive.addfile(directory)
+    return str(path)
+
+
+def write_local_entry(db_dir, name, version, description='', reason=None, **lists):
+    entry = os.path.join(db_dir, f"{name}-{version}")
+    os.makedirs(entry, exist_ok=True)
+    text = desc_text(name, version, description, **lists)
+    if reason is not None:
+        text += f"\n%REASON%\n{reason}\n"
+    with open(os.path.join(entry, 'desc'), 'w') as f:
+        f.write(text)
+    return entry
+
+
+CORE = [
+    ('bash', '5.2.026-2', 'The GNU Bourne Again shell',
+     {'provides': ['sh'], 'depends': ['readline', 'glibc'], 'license': ['GPL-3.0-or-later']}),
+    ('readline', '8.2.010-1', 'GNU readline library', {'depends': ['glibc']}),
+    ('glibc', '2.39-1', 'GNU C Library', {}),
+]
+EXTRA = [
+    ('python', '3.12.3-1', 'The Python programming language', {'optdepends': ['tk: for tkinter']}),
+    ('bash-completion', '2.14.0-1', 'Programmable completion for the bash shell', {}),
+]
+
+
+@pytest.fixture
+def sync_dir(tmp_path):
+    sync_dir = tmp_path / 'sync'
+    sync_dir.mkdir()
+    write_sync_db(sync_dir / 'core.db', CORE)
+    write_sync_db(sync_dir / 'extra.db', EXTRA, compression='xz')
+    return sync_dir
+
+
+def test_parse_desc():
+    fields = parse_desc(desc_text('bash', '5.2-1', 'shell', provides=['sh', 'bash-bin']))
+    assert fields['NAME'] == ['bash']
+    assert fields['PROVIDES'] == ['sh', 'bash-bin']
+
+
+def test_read_sync_db(sync_dir):
+    records = {record['name']: record for record in read_sync_db(str(sync_dir / 'core.db'))}
+    assert set(records) == {'bash', 'readline', 'glibc'}
+    assert records['bash']['repository'] == 'core'
+    assert records['bash']['provides'] == ['sh']
+    assert records['bash']['licenses'] == ['GPL-3.0-or-later']
+    assert records['glibc']['depends'] == []
+
+
+def test_sync_database_search_and_cache(sync_dir, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    db = SyncDatabase(db_dir=str(sync_dir), cache_dir=str(cache_dir))
+    assert db.load()
+    assert not db.load()
+    assert [pkg['name'] for pkg in db.search('bash')] == ['bash', 'bash-completion']
+    assert [pkg['name'] for pkg in db.search('gnu library')] == ['readline', 'glibc']
+    assert db.get('python')['repository'] == 'extra'
+    assert sorted(os.listdir(cache_dir)) == ['core.db.json', 'extra.db.json']
+
+    # A second instance takes an unchanged database from the cache, even
+    # if the archive itself could no longer be read
+    stat = os.stat(sync_dir / 'core.db')
+    (sync_dir / 'core.db').write_bytes(b'not a tar archive')
+    os.utime(sync_dir / 'core.db', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    cached = SyncDatabase(db_dir=str(sync_dir), cache_dir=str(cache_dir))
+    cached.load()
+    assert cached.get('bash')['provides'] == ['sh']
+    assert cached.get('python') is not None
+
+
+def test_sync_database_reparses_changed_db(sync_dir, tmp_path):
+    db = SyncDatabase(db_dir=str(sync_dir), cache_dir=str(tmp_path / 'cache'))
+    db.load()
+    write_sync_db(sync_dir / 'core.db', CORE + [('zlib', '1.3.1-1', 'Compression library', {})])
+    stat = os.stat(sync_dir / 'core.db')
+    os.utime(sync_dir / 'core.db', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert db.load()
+    assert db.get('zlib') is not None
+
+
+def test_local_database(tmp_path):
+    db_dir = tmp_path / 'local'
+    db_dir.mkdir()
+    (db_dir / 'ALPM_DB_VERSION').write_text('9\n')
+    write_local_entry(db_dir, 'bash', '5.2.026-2', 'The GNU Bourne Again shell', provides=['sh'])
+    write_local_entry(db_dir, 'readline', '8.2.010-1', 'GNU readline library', reason=1)
+
+    db = LocalDatabase(db_dir=str(db_dir))
+    assert db.load()
+    assert not db.load()
+    assert db.is_installed('bash')
+    assert db.version('readline') == '8.2.010-1'
+    assert db.get('bash')['reason'] == 'explicit'
+    assert db.get('readline')['reason'] == 'dependency'
+    assert [pkg['name'] for pkg in db.search('gnu shell')] == ['bash']
+
+    write_local_entry(db_dir, 'zsh', '5.9-5', 'A very advanced shell')
+    assert db.load()
+    assert db.is_installed('zsh')
+
+
+def test_local_database_rereads_rewritten_desc(tmp_path):
+    db_dir = tmp_path / 'local'
+    db_dir.mkdir()
+    write_local_entry(db_dir, 'bash', '5.2.026-2')
+    entry = write_local_entry(db_dir, 'readline', '8.2.010-1')
+
+    db = LocalDatabase(db_dir=str(db_dir))
+    db.load()
+    packages = db.packages
+    bash = db.get('bash')
+    assert db.get('readline')['reason'] == 'explicit'
+
+    # pacman -D --asdeps rewrites the desc file, the directory stays as it is
+    dir_stat = os.stat(db_dir)
+    write_local_entry(db_dir, 'readline', '8.2.010-1', reason=1)
+    desc = os.path.join(entry, 'desc')
+    desc_stat = os.stat(desc)
+    os.utime(desc, ns=(desc_stat.st_atime_ns, desc_stat.st_mtime_ns + 1000))
+    os.utime(db_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    assert db.load()
+    assert db.get('readline')['reason'] == 'dependency'
+    # Unchanged entries keep their record
+    assert db.get('bash') is bash
+    assert db.packages is not packages
+
+    packages = db.packages
+    assert not db.load()
+    assert db.packages is packages
+
+
+def test_local_database_skips_entries_without_desc(tmp_path):
+    db_dir = tmp_path / 'local'
+    (db_dir / 'half-written-1.0-1').mkdir(parents=True)
+    write_local_entry(db_dir, 'bash', '5.2.026-2')
+    db = LocalDatabase(db_dir=str(db_dir))
+    db.load()
+    assert db.loaded
+    assert list(db.packages) == ['bash']
+
+    write_local_entry(db_dir, 'half-written', '1.0-1')
+    assert db.load()
+    assert db.is_installed('half-written')
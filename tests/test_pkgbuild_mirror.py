@@ -0,0 +1,126 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from pkgbuild_mirror import MirrorError, PKGBUILDMirror, yay_build_dir
+
+
+def git(*args, cwd=None):
+    command = ['git', '-c', 'user.name=Packager', '-c', 'user.email=packager@example.org',
+               '-c', 'init.defaultBranch=master'] + list(args)
+    return subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+class StandInAUR:
+    """Bare repositories under root/remote, one per package base, like aur.archlinux.org"""
+
+    def __init__(self, root):
+        self.root = root
+        self.url = f"file://{root}/remote/{{}}.git"
+
+    def publish(self, pkgbase, pkgver):
+        remote = self.root / 'remote' / f"{pkgbase}.git"
+        work = self.root / 'work' / pkgbase
+        if not remote.exists():
+            git('init', '--quiet', '--bare', str(remote))
+            git('clone', '--quiet', str(remote), str(work))
+        (work / 'PKGBUILD').write_text(f"pkgname={pkgbase}\npkgver={pkgver}\npkgrel=1\n")
+        git('add', 'PKGBUILD', cwd=work)
+        git('commit', '--quiet', '-m', pkgver, cwd=work)
+        git('push', '--quiet', 'origin', 'HEAD:master', cwd=work)
+        return git('rev-parse', 'HEAD', cwd=work)
+
+    def yay_clone(self, pkgbase, build_dir):
+        """Clone like yay does before building"""
+        clone = build_dir / pkgbase
+        git('clone', '--quiet', self.url.format(pkgbase), str(clone))
+        return git('rev-parse', 'HEAD', cwd=clone)
+
+
+@pytest.fixture
+def aur(tmp_path):
+    return StandInAUR(tmp_path)
+
+
+@pytest.fixture
+def mirror(tmp_path, aur):
+    return PKGBUILDMirror(cache_dir=str(tmp_path / 'cache'), remote_url=aur.url,
+                          fetch_interval=60, build_dir=str(tmp_path / 'yay'))
+
+
+def test_fetch_and_refetch(aur, mirror):
+    first = aur.publish('foo', '1.0')
+    assert mirror.fetch('foo') == first
+    assert 'pkgver=1.0' in mirror.pkgbuild('foo')
+
+    second = aur.publish('foo', '1.1')
+    # Within the fetch interval the known revision is returned
+    assert mirror.fetch('foo') == first
+    assert mirror.fetch('foo', force=True) == second
+    assert 'pkgver=1.1' in mirror.pkgbuild('foo')
+
+
+def test_package_bases_share_one_repository(aur, mirror):
+    aur.publish('foo', '1.0')
+    aur.publish('bar', '2.0')
+    mirror.fetch('foo')
+    mirror.fetch('bar')
+    assert 'pkgname=bar' in mirror.pkgbuild('bar')
+    assert 'pkgname=foo' in mirror.pkgbuild('foo')
+    assert os.listdir(os.path.dirname(mirror.repo_dir)) == ['aur.git']
+
+
+def test_mark_installed_pins_the_revision_yay_built(aur, mirror, tmp_path):
+    aur.publish('foo', '1.0')
+    built = aur.yay_clone('foo', tmp_path / 'yay')
+    # Published while yay was building
+    newer = aur.publish('foo', '1.1')
+    mirror.fetch('foo')
+
+    assert mirror.diff_installed('foo') is None
+    assert mirror.mark_installed('foo') == built
+    assert mirror.installed_revision('foo') == built
+
+    diff = mirror.diff_installed('foo')
+    assert '-pkgver=1.0' in diff and '+pkgver=1.1' in diff
+    assert mirror.fetch('foo') == newer
+
+
+def test_mark_installed_without_build_directory(aur, mirror):
+    aur.publish('foo', '1.0')
+    with pytest.raises(MirrorError):
+        mirror.mark_installed('foo')
+    assert mirror.installed_revision('foo') is None
+
+
+def test_diff_installed_is_empty_when_up_to_date(aur, mirror, tmp_path):
+    aur.publish('foo', '1.0')
+    aur.yay_clone('foo', tmp_path / 'yay')
+    mirror.fetch('foo')
+    mirror.mark_installed('foo')
+    assert mirror.diff_installed('foo') == ''
+
+
+@pytest.mark.parametrize('pkgbase', ['', '-foo', '.foo', 'Foo', 'foo/../bar', 'foo bar', 'foo:bar', None])
+def test_invalid_package_bases_are_rejected(mirror, pkgbase):
+    for method in (mirror.fetch, mirror.pkgbuild, mirror.installed_revision,
+                   mirror.diff_installed, mirror.mark_installed):
+        with pytest.raises(MirrorError):
+            method(pkgbase)
+
+
+def test_valid_package_base_names(aur, mirror):
+    for pkgbase in ('python-foo', 'lib32-foo', 'foo++', 'foo@bar', 'foo_bar.baz'):
+        aur.publish(pkgbase, '1.0')
+        assert mirror.fetch(pkgbase) is not None
+
+
+def test_yay_build_dir(tmp_path):
+    config = tmp_path / 'config.json'
+    assert yay_build_dir(str(config)).endswith(os.path.join('', 'yay'))
+    config.write_text(json.dumps({'buildDir': '~/builds'}))
+    assert yay_build_dir(str(config)) == os.path.expanduser('~/builds')
+    config.write_text('not json')
+    assert yay_build_dir(str(config)).endswith(os.path.join('', 'yay'))
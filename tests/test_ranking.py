@@ -0,0 +1,28 @@
+from ranking import _package_key, rank_packages
+
+
+def make_packages(count):
+    return [{'name': f"tool-{i}", 'description': f"helper number {i} " + "extra words " * (i % 5),
+             'votes': i % 17, 'popularity': (i % 11) / 3.0} for i in range(count)]
+
+
+def test_limit_returns_the_head_of_the_full_ranking():
+    packages = make_packages(2000) + [{'name': 'helper', 'description': 'the helper'}]
+    full = rank_packages(packages, 'helper')
+    assert full[0]['name'] == 'helper'
+    assert rank_packages(packages, 'helper', limit=50) == full[:50]
+
+
+def test_prefix_matches_rank_above_description_matches():
+    packages = [{'name': 'other', 'description': 'uses yay internally'},
+                {'name': 'yay-bin', 'description': 'AUR helper'},
+                {'name': 'yay', 'description': 'AUR helper'}]
+    assert [pkg['name'] for pkg in rank_packages(packages, 'yay')] == ['yay', 'yay-bin', 'other']
+
+
+def test_key_cache_is_bounded():
+    _package_key.cache_clear()
+    rank_packages(make_packages(100), 'helper')
+    info = _package_key.cache_info()
+    assert info.currsize == 100
+    assert info.maxsize is not None
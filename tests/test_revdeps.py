@@ -0,0 +1,81 @@
+from revdeps import ReverseDependencyIndex
+
+
+def package(name, reason='explicit', depends=(), optdepends=(), provides=()):
+    return {'name': name, 'reason': reason, 'depends': list(depends),
+            'optdepends': list(optdepends), 'provides': list(provides)}
+
+
+INSTALLED = [
+    package('app', depends=['libfoo>=2', 'sh'], optdepends=['imagetool: thumbnails']),
+    package('libfoo', reason='dependency', depends=['libbar']),
+    package('libbar', reason='dependency'),
+    package('libshared', reason='dependency'),
+    package('viewer', depends=['libshared']),
+    package('editor', depends=['libshared', 'java-runtime']),
+    package('imagetool', optdepends=['libbar: faster decoding']),
+    package('bash', depends=['readline'], provides=['sh']),
+    package('dash', reason='dependency', provides=['sh']),
+    package('readline', reason='dependency'),
+    package('jre-openjdk', reason='dependency', provides=['java-runtime=21']),
+]
+
+
+def make_index(local_db, packages=INSTALLED):
+    local_db.set_packages(packages)
+    return ReverseDependencyIndex(local_db)
+
+
+def test_orphans_are_removed_with_the_target(local_db):
+    index = make_index(local_db)
+    removed, broken, optional = index.removal_impact(['app'])
+    assert removed == ['libbar', 'libfoo']
+    assert broken == {}
+    assert optional == {'imagetool': ['libbar']}
+
+
+def test_explicit_dependencies_are_kept(local_db):
+    packages = [pkg for pkg in INSTALLED if pkg['name'] != 'libbar'] + [package('libbar')]
+    index = make_index(local_db, packages)
+    removed, _broken, _optional = index.removal_impact(['app'])
+    assert removed == ['libfoo']
+
+
+def test_shared_dependency_stays_while_needed(local_db):
+    index = make_index(local_db)
+    assert index.removal_impact(['viewer']) == ([], {}, {})
+    removed, broken, _optional = index.removal_impact(['viewer', 'editor'])
+    assert removed == ['jre-openjdk', 'libshared']
+    assert broken == {}
+
+
+def test_removing_a_needed_package_breaks_its_requirers(local_db):
+    index = make_index(local_db)
+    _removed, broken, _optional = index.removal_impact(['libshared'])
+    assert broken == {'editor': ['libshared'], 'viewer': ['libshared']}
+    _removed, broken, _optional = index.removal_impact(['jre-openjdk'])
+    assert broken == {'editor': ['java-runtime']}
+
+
+def test_provides_keep_dependencies_satisfied(local_db):
+    index = make_index(local_db)
+    # dash still provides sh, so app is not broken and dash stays
+    removed, broken, _optional = index.removal_impact(['bash'])
+    assert removed == ['readline']
+    assert broken == {}
+    _removed, broken, _optional = index.removal_impact(['bash', 'dash'])
+    assert broken == {'app': ['sh']}
+
+
+def test_index_follows_reason_changes(local_db):
+    index = make_index(local_db)
+    assert index.removal_impact(['app'])[0] == ['libbar', 'libfoo']
+
+    # pacman -D --asexplicit libbar replaces the record
+    local_db.set_packages([pkg for pkg in INSTALLED if pkg['name'] != 'libbar'] + [package('libbar')])
+    assert index.removal_impact(['app'])[0] == ['libfoo']
+
+
+def test_unknown_targets_have_no_impact(local_db):
+    index = make_index(local_db)
+    assert index.removal_impact(['not-installed']) == ([], {}, {})
@@ -0,0 +1,58 @@
+from search import ResultNarrower, SearchSource, is_refinement, search_sources
+
+
+def pkg(name, repository, description='', version='1.0-1'):
+    return {'name': name, 'repository': repository, 'description': description, 'version': version}
+
+
+def test_lower_rank_wins_duplicates():
+    sources = [
+        SearchSource('aur', lambda q: [pkg('yay', 'aur'), pkg('paru', 'aur')], rank=1),
+        SearchSource('sync', lambda q: [pkg('paru', 'extra')], rank=0),
+    ]
+    packages, latencies, complete = search_sources('helper', sources)
+    assert complete
+    assert {p['name']: p['repository'] for p in packages} == {'yay': 'aur', 'paru': 'extra'}
+    assert set(latencies) == {'aur', 'sync'}
+
+
+def test_installed_source_adds_unknown_packages_without_marking_records():
+    record = pkg('yay', 'aur')
+    sources = [
+        SearchSource('aur', lambda q: [record]),
+        SearchSource('installed', lambda q: [pkg('yay', 'local'), pkg('my-fork', 'local')],
+                     annotates=True),
+    ]
+    packages, _latencies, _complete = search_sources('y', sources)
+    assert [p['repository'] for p in packages] == ['aur', 'local']
+    assert all('installed' not in p for p in packages)
+    assert packages[0] is record
+
+
+def test_failed_source_marks_result_incomplete():
+    def fail(query):
+        raise OSError('offline')
+
+    updates = []
+    sources = [SearchSource('sync', lambda q: [pkg('bash', 'core')]), SearchSource('aur', fail)]
+    packages, latencies, complete = search_sources(
+        'bash', sources, on_update=lambda packages, latencies: updates.append(packages))
+    assert not complete
+    assert latencies['aur'] is None
+    assert [p['name'] for p in packages] == ['bash']
+    assert updates == [packages]
+
+
+def test_cancelled_search_returns_none():
+    sources = [SearchSource('sync', lambda q: [pkg('bash', 'core')])]
+    assert search_sources('bash', sources, is_cancelled=lambda: True) is None
+
+
+def test_narrower_filters_refined_queries():
+    narrower = ResultNarrower()
+    narrower.remember('python', [pkg('python-requests', 'extra', 'HTTP for humans'),
+                                 pkg('python-numpy', 'extra', 'arrays')])
+    assert is_refinement('python', 'python req')
+    assert [p['name'] for p in narrower.narrow('python req')] == ['python-requests']
+    assert narrower.narrow('rust') is None
+    assert narrower.narrow('python maintainer:foo') is None
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+import search_cache
+from search_cache import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_cache, 'time', clock)
+    return clock
+
+
+def packages(count, prefix='pkg'):
+    return [{'name': f"{prefix}-{i}", 'description': 'x' * 50} for i in range(count)]
+
+
+def make_cache(tmp_path, **kwargs):
+    return SearchCache(cache_dir=str(tmp_path / 'search'), **kwargs)
+
+
+def disk_files(cache):
+    return sorted(name for name in os.listdir(cache.cache_dir) if name.endswith('.json'))
+
+
+def test_queries_are_normalized(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put('Python  Requests', packages(2))
+    assert cache.get(' python requests ') == (packages(2), True)
+    assert cache.get('python') is None
+    assert cache.get('   ') is None
+
+
+def test_ttl_freshness_and_max_age(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=60, max_age=3600)
+    cache.put('yay', packages(1))
+    clock.now += 59
+    assert cache.get('yay')[1]
+    # Stale results are still returned for instant display
+    clock.now += 2
+    assert cache.get('yay') == (packages(1), False)
+    clock.now += 3600
+    assert cache.get('yay') is None
+    assert disk_files(cache) == []
+
+
+def test_memory_lru_eviction_falls_back_to_disk(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put('a', packages(1, 'a'))
+    cache.put('b', packages(1, 'b'))
+    cache.get('a')
+    cache.put('c', packages(1, 'c'))
+    assert set(cache._memory) == {'a', 'c'}
+
+    # b was evicted from memory but is read back from disk
+    assert cache.get('b') == (packages(1, 'b'), True)
+    assert set(cache._memory) == {'c', 'b'}
+
+
+def test_disk_cap_drops_oldest_files(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put('probe', packages(10))
+    entry_size = os.path.getsize(os.path.join(cache.cache_dir, disk_files(cache)[0]))
+    cache.clear()
+
+    cache = make_cache(tmp_path, max_disk_bytes=entry_size * 2 + entry_size // 2)
+    for i, query in enumerate(('first', 'second', 'third')):
+        cache.put(query, packages(10, query))
+        path = cache._path(query)
+        os.utime(path, (clock.now + i, clock.now + i))
+    assert len(disk_files(cache)) == 2
+    assert not os.path.exists(cache._path('first'))
+
+    fresh = make_cache(tmp_path)
+    assert fresh.get('first') is None
+    assert fresh.get('third') == (packages(10, 'third'), True)
+
+
+def test_unpersisted_and_large_results_stay_in_memory(tmp_path, clock):
+    cache = make_cache(tmp_path, max_disk_packages=5)
+    cache.put('local', packages(3), persist=False)
+    cache.put('large', packages(6))
+    cache.put('small', packages(5))
+    assert cache.get('local') == (packages(3), True)
+    assert cache.get('large') == (packages(6), True)
+    assert disk_files(cache) == [os.path.basename(cache._path('small'))]
+
+
+def test_invalidate_and_clear(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put('a', packages(1))
+    cache.put('b', packages(1))
+    cache.invalidate('a')
+    assert cache.get('a') is None
+    cache.clear()
+    assert cache.get('b') is None
+    assert disk_files(cache) == []
@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+from yay_parser import iter_yay_packages, parse_yay_output
+
+
+OUTPUT = """\
+aur/yay 12.3.5-1 (+2343 20.04) (Installed)
+    Yet another yogurt. Pacman wrapper and AUR helper written in go.
+aur/yay-git 12.3.5.r4.g1a2b3c4-1 (+90 1.00)
+    pacman>6.1  git
+    pacman 6.1.0-3 (1.1 MiB 4.6 MiB) (Installed)
+    A library-based package manager with dependency support
+    pacman-contrib 1.10.6-1 (37.6 KiB 132.0 KiB)
+    yay-bin 12.3.5-1 (+400 5.10)
+    paru-bin r245.2f0b3c1-1 (+12 0.30)
+aur/no-description 0.1-1 (+0 0.00)
+aur/last 1.0-1 (+1 0.01)
+"""
+
+EXPECTED = [
+    {'name': 'yay', 'version': '12.3.5-1',
+     'description': 'Yet another yogurt. Pacman wrapper and AUR helper written in go.'},
+    {'name': 'yay-git', 'version': '12.3.5.r4.g1a2b3c4-1', 'description': 'pacman>6.1  git'},
+    {'name': 'pacman', 'version': '6.1.0-3',
+     'description': 'A library-based package manager with dependency support'},
+    # A line that looks like the next package is never taken as a description
+    {'name': 'pacman-contrib', 'version': '1.10.6-1', 'description': ''},
+    {'name': 'yay-bin', 'version': '12.3.5-1', 'description': ''},
+    {'name': 'paru-bin', 'version': 'r245.2f0b3c1-1', 'description': ''},
+    {'name': 'no-description', 'version': '0.1-1', 'description': ''},
+    {'name': 'last', 'version': '1.0-1', 'description': ''},
+]
+
+
+def test_batch_parser():
+    assert parse_yay_output(OUTPUT) == EXPECTED
+
+
+@pytest.mark.parametrize('output', [OUTPUT, OUTPUT.rstrip('\n'), '\n' + OUTPUT, ''])
+def test_streaming_and_batch_parsers_agree(output):
+    assert list(iter_yay_packages(io.StringIO(output))) == parse_yay_output(output)
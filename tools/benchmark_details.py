@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Measure frame times while paging the details pane through packages.
+
+Usage:
+    benchmark_details.py [--count N]
+
+Opens a window holding only the details pane, fed with generated
+records, and renders one package per frame: first with the previous
+implementation (remove every child, create new labels), then with the
+pooled rows of MainWindow.display_package_details. No MainWindow is
+created, so there is no disclaimer, index download or pacman access.
+Needs a display, e.g. run it under xvfb-run.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import gi
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gtk, Adw  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from package_details import DETAIL_FIELDS, format_value  # noqa: E402
+import window  # noqa: E402
+from window import MainWindow, load_translations  # noqa: E402
+
+
+class DetailsPane:
+    """The widgets the details methods of MainWindow work on, nothing else"""
+
+    # Borrowed so the benchmark measures the shipped renderer
+    create_details_rows = MainWindow.create_details_rows
+    display_package_details = MainWindow.display_package_details
+    update_button_state = MainWindow.update_button_state
+
+    def __init__(self):
+        self.details_grid = Gtk.Grid()
+        self.details_grid.set_column_spacing(10)
+        self.details_grid.set_row_spacing(8)
+        self.details_label = Gtk.Label(label=window.STRINGS.get('STRING_SELECT_PACKAGE', 'Select a package'))
+        self.details_rows = {}
+
+        self.status_button = Gtk.Label()
+        self.install_button = Gtk.Button()
+        self.uninstall_button = Gtk.Button()
+        self.aur_button = Gtk.Button()
+        self.dependencies_button = Gtk.Button()
+        self.pkgbuild_button = Gtk.Button()
+        self.reset()
+
+    def reset(self):
+        """Empty grid with only the message label and fresh pooled rows"""
+        child = self.details_grid.get_first_child()
+        while child:
+            self.details_grid.remove(child)
+            child = self.details_grid.get_first_child()
+        self.details_grid.attach(self.details_label, 0, 0, 2, 1)
+        self.details_label.set_visible(True)
+        self.details_rows = {}
+        self.create_details_rows()
+
+
+def legacy_display_package_details(pane, details_data, installed, package_name):
+    """The teardown-and-rebuild renderer display_package_details used before."""
+    formatted_data = {fallback: format_value(key, details_data.get(key))
+                      for key, _string_key, fallback in DETAIL_FIELDS}
+    formatted_data = {key: value for key, value in formatted_data.items() if value}
+
+    child = pane.details_grid.get_first_child()
+    while child:
+        pane.details_grid.remove(child)
+        child = pane.details_grid.get_first_child()
+
+    row = 0
+    for key, value in formatted_data.items():
+        key_label = Gtk.Label(label=key)
+        key_label.add_css_class("monospace")
+        key_label.set_halign(Gtk.Align.END)
+        key_label.set_markup(f"<b>{key}</b>")
+
+        value_label = Gtk.Label(label=value)
+        value_label.set_wrap(True)
+        value_label.set_selectable(True)
+        value_label.set_halign(Gtk.Align.START)
+        value_label.set_hexpand(True)
+
+        pane.details_grid.attach(key_label, 0, row, 1, 1)
+        pane.details_grid.attach(value_label, 1, row, 1, 1)
+        row += 1
+
+    pane.update_button_state(installed)
+    pane.aur_button.set_sensitive(True)
+
+
+def generate_details(count):
+    packages = []
+    for i in range(count):
+        packages.append({
+            'name': f"package-{i}",
+            'version': f"{i % 7}.{i % 13}.{i}-1",
+            'description': f"Example package number {i} " + "with a longer description " * (i % 4),
+            'repository': 'aur',
+            'url': f"https://example.org/package-{i}",
+            'licenses': ['GPL-3.0-or-later'] if i % 2 else ['MIT'],
+            'groups': ['example-group'] if i % 3 == 0 else [],
+            'depends': [f"lib{j}" for j in range(i % 5)],
+            'maintainer': f"maintainer{i % 11}",
+            'votes': i * 3,
+            'popularity': i / 7.0,
+            'last_modified': 1700000000 + i * 86400,
+        })
+    return packages
+
+
+def run_pass(pane, render, packages, done):
+    """Render one package per frame, collect frame intervals and render times."""
+    intervals = []
+    render_times = []
+    state = {'index': 0, 'last': None}
+
+    def on_tick(widget, frame_clock):
+        now = frame_clock.get_frame_time()
+        if state['last'] is not None:
+            intervals.append((now - state['last']) / 1000.0)
+        state['last'] = now
+
+        if state['index'] >= len(packages):
+            done(intervals, render_times)
+            return False
+        details = packages[state['index']]
+        start = time.perf_counter()
+        render(pane, details, state['index'] % 2 == 0, details['name'])
+        render_times.append((time.perf_counter() - start) * 1000.0)
+        state['index'] += 1
+        return True
+
+    pane.details_grid.add_tick_callback(on_tick)
+
+
+def report(name, intervals, render_times):
+    intervals = sorted(intervals)
+    p95 = intervals[int(len(intervals) * 0.95) - 1]
+    print(f"{name:8} frames {len(intervals):4}  mean {statistics.mean(intervals):6.2f} ms  "
+          f"p95 {p95:6.2f} ms  max {intervals[-1]:6.2f} ms  "
+          f"render mean {statistics.mean(render_times):5.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100)
+    args = parser.parse_args()
+
+    load_translations('en')
+    packages = generate_details(args.count)
+    app = Adw.Application(application_id='org.gnome.AURManager.Benchmark')
+
+    def on_activate(app):
+        pane = DetailsPane()
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_child(pane.details_grid)
+        host = Gtk.ApplicationWindow(application=app, title="Details benchmark")
+        host.set_default_size(700, 800)
+        host.set_child(scrolled)
+        host.present()
+
+        def pooled_done(intervals, render_times):
+            report('pooled', intervals, render_times)
+            app.quit()
+
+        def legacy_done(intervals, render_times):
+            report('legacy', intervals, render_times)
+            pane.reset()
+            run_pass(pane, DetailsPane.display_package_details, packages, pooled_done)
+
+        # Give the window a moment to settle before measuring
+        start = time.monotonic()
+
+        def wait_for_window(widget, frame_clock):
+            if time.monotonic() - start < 1.0:
+                return True
+            run_pass(pane, legacy_display_package_details, packages, legacy_done)
+            return False
+
+        pane.details_grid.add_tick_callback(wait_for_window)
+
+    app.connect('activate', on_activate)
+    app.run([])
+
+
+if __name__ == '__main__':
+    main()
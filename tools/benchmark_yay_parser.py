@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Benchmark the yay -Ss parser and compare it with the previous implementation.
+
+Usage:
+    benchmark_yay_parser.py                  run against the corpus
+    benchmark_yay_parser.py --record QUERY   record yay -Ss QUERY into the corpus
+
+Recorded outputs are stored in tools/yay-corpus/. Sizes that are not
+covered by a recording are generated in yay's output format.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from yay_parser import parse_yay_output  # noqa: E402
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'yay-corpus')
+SIZES = [10, 100, 1000, 10000, 50000]
+WORDS = ['python', 'library', 'git', 'bindings', 'tool', 'gtk', 'qt', 'rust',
+         'client', 'server', 'plugin', 'font', 'theme', 'driver', 'for', 'the']
+
+
+def legacy_parse_yay_output(output):
+    """The index-walking parser that MainWindow.parse_yay_output used before."""
+    packages = []
+    lines = output.strip().split('\n')
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        if line.startswith("aur/"):
+            parts = line.split()
+            if len(parts) >= 2:
+                name = parts[0].replace("aur/", "")
+                version = parts[1] if len(parts) > 1 else ""
+
+                description = ""
+                if i + 1 < len(lines) and lines[i + 1].startswith("    "):
+                    description = lines[i + 1].strip()
+                    i += 1
+
+                packages.append({
+                    'name': name,
+                    'version': version,
+                    'description': description
+                })
+        elif line.startswith("    ") and not line.strip().startswith("("):
+            stripped = line.strip()
+            parts = stripped.split()
+
+            if len(parts) >= 2:
+                potential_version = parts[1]
+                is_version = any(c.isdigit() for c in potential_version) or potential_version.startswith('r')
+
+                if is_version:
+                    name = parts[0]
+                    version = potential_version
+
+                    description = ""
+                    if i + 1 < len(lines) and lines[i + 1].startswith("    "):
+                        next_line = lines[i + 1].strip()
+                        next_parts = next_line.split()
+                        if len(next_parts) > 0:
+                            is_next_package = (len(next_parts) > 1 and
+                                               any(c.isdigit() for c in next_parts[1]))
+                            if not is_next_package:
+                                description = next_line
+                                i += 1
+
+                    packages.append({
+                        'name': name,
+                        'version': version,
+                        'description': description
+                    })
+
+        i += 1
+
+    return packages
+
+
+def generate_output(count, seed=0):
+    """Generate yay -Ss output with count packages, a fifth of them from repos.
+
+    Repository entries use the indented header layout yay_parser reads,
+    AUR entries the aur/ header, both followed by an indented description.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}"
+        version = f"{rng.randint(0, 20)}.{rng.randint(0, 99)}.{rng.randint(0, 9)}-{rng.randint(1, 3)}"
+        # Leading whitespace of the output is stripped, so start with an AUR entry
+        if rng.random() < 0.2 and i:
+            header = f"    {name} {version} ({rng.randint(1, 900)}.{rng.randint(0, 9)} KiB 1.2 MiB)"
+        else:
+            header = f"aur/{name} {version} (+{rng.randint(0, 3000)} {rng.random() * 10:.2f})"
+        if rng.random() < 0.1:
+            header += " (Installed)"
+        lines.append(header)
+        lines.append("    " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 14))))
+    return "\n".join(lines) + "\n"
+
+
+def load_corpus():
+    corpus = []
+    if os.path.isdir(CORPUS_DIR):
+        for name in sorted(os.listdir(CORPUS_DIR)):
+            with open(os.path.join(CORPUS_DIR, name), 'r', encoding='utf-8') as f:
+                corpus.append((name, f.read()))
+    for size in SIZES:
+        corpus.append((f"generated-{size}", generate_output(size, seed=size)))
+    return corpus
+
+
+def record(queries):
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    for query in queries:
+        result = subprocess.run(['yay', '-Ss', query], capture_output=True, text=True)
+        path = os.path.join(CORPUS_DIR, f"{query}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(result.stdout)
+        print(f"{path}: {len(parse_yay_output(result.stdout))} packages")
+
+
+def best_time(func, output, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(output)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeat):
+    print(f"{'corpus':<24}{'results':>9}{'legacy ms':>12}{'new ms':>10}{'results/s':>14}{'speedup':>9}")
+    failures = 0
+    for name, output in load_corpus():
+        expected = legacy_parse_yay_output(output)
+        packages = parse_yay_output(output)
+        if packages != expected:
+            failures += 1
+            print(f"{name}: results differ from the legacy parser")
+            continue
+
+        legacy = best_time(legacy_parse_yay_output, output, repeat)
+        new = best_time(parse_yay_output, output, repeat)
+        throughput = len(packages) / new if new else float('inf')
+        print(f"{name:<24}{len(packages):>9}{legacy * 1000:>12.2f}{new * 1000:>10.2f}"
+              f"{throughput:>14.0f}{legacy / new:>8.1f}x")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the yay -Ss parser')
+    parser.add_argument('--record', nargs='+', metavar='QUERY',
+                        help='Record yay -Ss output for the queries into the corpus')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per corpus entry, the best time is reported')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+        return 0
+    return run(args.repeat)
+
+
+if __name__ == '__main__':
+    sys.exit(main())